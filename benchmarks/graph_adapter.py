@@ -0,0 +1,97 @@
+"""Micro-benchmark of streaming token events through the GraphRunAdapter.
+
+Reports the events/second through `astream_updates` (fed by a fake graph so only the adapter is
+timed), and the per-token cost of the previous validated event/update models (a pydantic `LgEvent`
+and an `rx.Base` `AIStreamUpdate` per token) vs the plain tuple/dataclass now used.
+
+Run with `uv run python -m benchmarks.graph_adapter` (or `task bench`).
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, AsyncIterator, Literal, cast
+
+import reflex as rx
+from langchain_core.messages import AIMessageChunk
+from langgraph.pregel import Pregel
+from pydantic import BaseModel
+
+from mcp_chat.graph.langgraph_adapters import GraphRunAdapter, LgEvent
+from mcp_chat.models import AIStreamUpdate, InputState, UpdateTypes
+
+
+class ValidatedLgEvent(BaseModel):
+    """The previous (pydantic) LgEvent."""
+
+    mode: Literal["values", "messages", "custom"]
+    data: Any
+
+
+class ValidatedAIStreamUpdate(rx.Base):
+    """The previous (rx.Base) AIStreamUpdate."""
+
+    type_ = UpdateTypes.ai_stream
+    m_id: str
+    delta: str
+
+
+class FakeGraph:
+    """Yields pre-made token events as fast as possible."""
+
+    def __init__(self, events: list[tuple[str, Any]]) -> None:
+        self.events = events
+
+    async def astream(self, **_: Any) -> AsyncIterator[tuple[str, Any]]:  # noqa: ANN401
+        for event in self.events:
+            yield event
+
+
+def make_events(tokens: int) -> list[tuple[str, Any]]:
+    metadata = {"langgraph_node": "call_llm"}
+    events: list[tuple[str, Any]] = [
+        ("messages", (AIMessageChunk(content=f"tok{i} ", id="run-1"), metadata))
+        for i in range(tokens)
+    ]
+    end = AIMessageChunk(content="", id="run-1", response_metadata={"finish_reason": "stop"})
+    events.append(("messages", (end, metadata)))
+    return events
+
+
+async def time_adapter(events: list[tuple[str, Any]]) -> float:
+    adapter = GraphRunAdapter(cast(Pregel, FakeGraph(events)))
+    start = time.perf_counter()
+    async for _ in adapter.astream_updates(input=InputState(question="Hi")):
+        pass
+    return time.perf_counter() - start
+
+
+def time_models(events: list[tuple[str, Any]], validated: bool) -> float:
+    start = time.perf_counter()
+    for mode, data in events:
+        if validated:
+            ValidatedLgEvent(mode=mode, data=data)  # pyright: ignore[reportArgumentType]
+            ValidatedAIStreamUpdate(m_id="run-1", delta="tok")
+        else:
+            LgEvent._make((mode, data))
+            AIStreamUpdate(m_id="run-1", delta="tok")
+    return time.perf_counter() - start
+
+
+async def main(tokens: int) -> None:
+    events = make_events(tokens)
+    adapter_s = await time_adapter(events)
+    validated_s = time_models(events, validated=True)
+    plain_s = time_models(events, validated=False)
+
+    print(f"{len(events)} token events")
+    print(f"  astream_updates:                 {len(events) / adapter_s:10.0f} events/s")
+    print(f"  validated event + update models: {validated_s / len(events) * 1e6:10.2f} us/event")
+    print(f"  plain event + update:            {plain_s / len(events) * 1e6:10.2f} us/event")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=10_000, help="Number of streamed tokens")
+    args = parser.parse_args()
+    asyncio.run(main(args.tokens))
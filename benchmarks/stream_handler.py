@@ -0,0 +1,71 @@
+"""Micro-benchmark of accumulating a long streamed answer in the MessagesStreamHandler.
+
+Compares adding the AIMessageChunks together per token (`a + b`, quadratic in the answer length)
+with the `AIMessageAccumulator` used by the handler, and times the full `handle_stream_event` path.
+
+Run with `uv run python -m benchmarks.stream_handler` (or `task bench`).
+"""
+
+import argparse
+import time
+from typing import Any
+
+from langchain_core.messages import AIMessageChunk
+
+from mcp_chat.graph.chunk_accumulator import AIMessageAccumulator
+from mcp_chat.graph.langgraph_adapters import LgEvent, MessagesStreamHandler
+
+
+def make_chunks(tokens: int) -> list[AIMessageChunk]:
+    chunks = [AIMessageChunk(content=f"tok{i} ", id="run-1") for i in range(tokens)]
+    chunks.append(
+        AIMessageChunk(content="", id="run-1", response_metadata={"finish_reason": "stop"})
+    )
+    return chunks
+
+
+def time_added(chunks: list[AIMessageChunk]) -> float:
+    start = time.perf_counter()
+    message = chunks[0]
+    for chunk in chunks[1:]:
+        message += chunk  # pyright: ignore[reportOperatorIssue]
+    return time.perf_counter() - start
+
+
+def time_accumulated(chunks: list[AIMessageChunk]) -> float:
+    start = time.perf_counter()
+    accumulator = AIMessageAccumulator(chunks[0])
+    for chunk in chunks[1:]:
+        accumulator.add(chunk)
+    accumulator.to_message()
+    return time.perf_counter() - start
+
+
+def time_handler(chunks: list[AIMessageChunk]) -> float:
+    handler = MessagesStreamHandler(listen_nodes=["call_llm"])
+    metadata: dict[str, Any] = {"langgraph_node": "call_llm"}
+    events = [LgEvent(mode="messages", data=(chunk, metadata)) for chunk in chunks]
+    start = time.perf_counter()
+    for event in events:
+        for _ in handler.handle_stream_event(event):
+            pass
+    return time.perf_counter() - start
+
+
+def main(tokens: int) -> None:
+    chunks = make_chunks(tokens)
+    added_s = time_added(chunks)
+    accumulated_s = time_accumulated(chunks)
+    handler_s = time_handler(chunks)
+
+    print(f"{tokens} token answer")
+    print(f"  chunks added per token:     {added_s * 1e3:8.1f} ms")
+    print(f"  chunks accumulated:         {accumulated_s * 1e3:8.1f} ms")
+    print(f"  handle_stream_event (all):  {handler_s * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=10_000, help="Number of streamed tokens")
+    args = parser.parse_args()
+    main(args.tokens)
@@ -0,0 +1,58 @@
+"""Micro-benchmark of making a ToolNode per tool step vs reusing a cached one.
+
+Run with `uv run python -m benchmarks.tool_node` (or `task bench`).
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Callable
+
+from langchain_core.messages import AIMessage, ToolCall
+from langchain_core.tools import StructuredTool
+from langgraph.prebuilt import ToolNode
+
+from mcp_chat.graph.tool_binding import clear_bound_model_cache, get_tool_node
+
+
+def make_tools(n: int) -> list[StructuredTool]:
+    async def echo(text: str) -> str:
+        return text
+
+    return [
+        StructuredTool.from_function(
+            coroutine=echo, name=f"tool_{i}", description=f"Echo the text back (tool {i})"
+        )
+        for i in range(n)
+    ]
+
+
+async def time_steps(make_node: Callable[[], ToolNode], steps: int) -> float:
+    message = AIMessage(
+        content="", tool_calls=[ToolCall(id="call-id", name="tool_0", args={"text": "hi"})]
+    )
+    start = time.perf_counter()
+    for _ in range(steps):
+        await make_node().ainvoke(input={"messages": [message]})
+    return (time.perf_counter() - start) / steps
+
+
+async def main(num_tools: int, steps: int) -> None:
+    tools = make_tools(num_tools)
+    clear_bound_model_cache()
+
+    new_s = await time_steps(lambda: ToolNode(tools=tools, name="tool_node"), steps)
+    cached_s = await time_steps(lambda: get_tool_node(tools), steps)
+
+    print(f"{num_tools} tools, {steps} tool steps")
+    print(f"  new ToolNode per step:    {new_s * 1e6:8.1f} us/step")
+    print(f"  cached ToolNode per step: {cached_s * 1e6:8.1f} us/step")
+    print(f"  saving:                   {(new_s - cached_s) * 1e6:8.1f} us/step")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tools", type=int, default=200, help="Number of tools loaded")
+    parser.add_argument("--steps", type=int, default=200, help="Number of tool steps to time")
+    args = parser.parse_args()
+    asyncio.run(main(args.tools, args.steps))
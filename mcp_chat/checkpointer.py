@@ -0,0 +1,198 @@
+"""In-memory langgraph checkpointer that bounds how much it keeps.
+
+`MemorySaver` keeps every checkpoint (the full graph state after every step) of every thread for
+the lifetime of the process. Since each run gets its own thread, that grows without limit. This
+evicts whole threads, least recently used first, once there are more than `max_threads` or they
+take more than `max_bytes` (serialized) in total, and drops threads not used for `ttl_s`.
+
+The thread currently being written is never evicted, so a single run can always finish (and be
+resumed) even if it alone exceeds the limits.
+
+With `shallow=True`, only the latest checkpoint of each thread is kept (older checkpoints, their
+pending writes and channel values no longer referenced are dropped on every put). That is all that is
+needed to continue a conversation on its own thread, and keeps a long conversation's thread from
+growing with every step it has ever taken (at the cost of history for time travel/replay).
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+
+class _ThreadUsage:
+    __slots__ = ("last_used", "size", "blob_keys", "write_keys")
+
+    def __init__(self) -> None:
+        self.last_used = time.monotonic()
+        self.size = 0
+        self.blob_keys: set[tuple] = set()
+        self.write_keys: set[tuple] = set()
+
+
+class BoundedMemorySaver(InMemorySaver):
+    def __init__(
+        self,
+        max_threads: int | None = 1000,
+        ttl_s: float | None = None,
+        max_bytes: int | None = None,
+        shallow: bool = False,
+    ) -> None:
+        """Initializes the checkpointer.
+
+        Args:
+            max_threads: Max number of threads kept (None for no limit).
+            ttl_s: Threads not used for this long are dropped (None to keep them).
+            max_bytes: Max total (serialized) size of the kept checkpoints (None for no limit).
+            shallow: Keep only the latest checkpoint of each thread.
+        """
+        super().__init__()
+        self.max_threads = max_threads
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.shallow = shallow
+        self._threads: OrderedDict[str, _ThreadUsage] = OrderedDict()
+        self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    @property
+    def thread_ids(self) -> list[str]:
+        """Threads currently kept (least recently used first)."""
+        return list(self._threads)
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        thread_id = (config.get("configurable") or {})["thread_id"]
+        if thread_id not in self._threads:
+            # (also avoids the base class adding an empty entry for every unknown thread)
+            return None
+        self._touch(thread_id)
+        return super().get_tuple(config)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saved_config = super().put(config, checkpoint, metadata, new_versions)
+        configurable = config.get("configurable") or {}
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable["checkpoint_ns"]
+        usage = self._touch(thread_id)
+
+        added = 0
+        for channel, version in new_versions.items():
+            key = (thread_id, checkpoint_ns, channel, version)
+            if key not in usage.blob_keys:
+                usage.blob_keys.add(key)
+                added += len(self.blobs[key][1])
+        saved = self.storage[thread_id][checkpoint_ns][checkpoint["id"]]
+        added += len(saved[0][1]) + len(saved[1][1])
+        self._add_size(usage, added)
+        if self.shallow:
+            self._drop_older_checkpoints(usage, thread_id, checkpoint_ns, checkpoint)
+        self._evict(keep=thread_id)
+        return saved_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config.get("configurable") or {}
+        thread_id = configurable["thread_id"]
+        outer_key = (
+            thread_id,
+            configurable.get("checkpoint_ns", ""),
+            configurable["checkpoint_id"],
+        )
+        before = self._writes_size(outer_key)
+        super().put_writes(config, writes, task_id, task_path)
+        usage = self._touch(thread_id)
+        usage.write_keys.add(outer_key)
+        self._add_size(usage, self._writes_size(outer_key) - before)
+        self._evict(keep=thread_id)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Drop all checkpoints (and pending writes) of the thread."""
+        usage = self._threads.pop(thread_id, None)
+        self.storage.pop(thread_id, None)
+        if usage is None:
+            return
+        for key in usage.blob_keys:
+            self.blobs.pop(key, None)
+        for key in usage.write_keys:
+            self.writes.pop(key, None)
+        self._total_bytes -= usage.size
+
+    def _touch(self, thread_id: str) -> _ThreadUsage:
+        usage = self._threads.get(thread_id)
+        if usage is None:
+            usage = self._threads[thread_id] = _ThreadUsage()
+        usage.last_used = time.monotonic()
+        self._threads.move_to_end(thread_id)
+        return usage
+
+    def _add_size(self, usage: _ThreadUsage, size: int) -> None:
+        usage.size += size
+        self._total_bytes += size
+
+    def _writes_size(self, outer_key: tuple) -> int:
+        writes = self.writes.get(outer_key) or {}
+        return sum(len(write[2][1]) for write in writes.values())
+
+    def _drop_older_checkpoints(
+        self, usage: _ThreadUsage, thread_id: str, checkpoint_ns: str, checkpoint: Checkpoint
+    ) -> None:
+        """Drop everything of the thread (namespace) not needed by the checkpoint."""
+        removed = 0
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        for checkpoint_id in [id_ for id_ in checkpoints if id_ != checkpoint["id"]]:
+            saved = checkpoints.pop(checkpoint_id)
+            removed += len(saved[0][1]) + len(saved[1][1])
+            write_key = (thread_id, checkpoint_ns, checkpoint_id)
+            removed += self._writes_size(write_key)
+            self.writes.pop(write_key, None)
+            usage.write_keys.discard(write_key)
+
+        versions = checkpoint["channel_versions"]
+        stale = [
+            key
+            for key in usage.blob_keys
+            if key[1] == checkpoint_ns and versions.get(key[2]) != key[3]
+        ]
+        for key in stale:
+            usage.blob_keys.discard(key)
+            blob = self.blobs.pop(key, None)
+            if blob is not None:
+                removed += len(blob[1])
+        self._add_size(usage, -removed)
+
+    def _evict(self, keep: str) -> None:
+        """Drop expired threads, then the least recently used until within the limits."""
+        now = time.monotonic()
+        while len(self._threads) > 1:
+            thread_id, usage = next(iter(self._threads.items()))
+            if thread_id == keep:
+                break
+            if not (
+                (self.ttl_s is not None and now - usage.last_used > self.ttl_s)
+                or (self.max_threads is not None and len(self._threads) > self.max_threads)
+                or (self.max_bytes is not None and self._total_bytes > self.max_bytes)
+            ):
+                break
+            self.delete_thread(thread_id)
@@ -19,6 +19,20 @@ def render_qa(qa: QA) -> rx.Component:
     Args:
         qa: The question/answer pair.
 
+    Returns:
+        A component displaying the question/answer pair.
+    """
+    return render_question_answer(qa.question, qa.tool_uses, qa.answer)
+
+
+def render_question_answer(question: str, tool_uses: list[ToolsUse], answer: str) -> rx.Component:
+    """A question with any tool uses and the answer.
+
+    Args:
+        question: The question.
+        tool_uses: The tools used while answering.
+        answer: The answer.
+
     Returns:
         A component displaying the question/answer pair.
     """
@@ -50,7 +64,7 @@ def render_qa(qa: QA) -> rx.Component:
     return rx.box(
         rx.box(
             rx.markdown(
-                qa.question,
+                question,
                 background_color=rx.color("mauve", 4),
                 color=rx.color("mauve", 12),
                 style=rx.Style(message_style),
@@ -61,15 +75,15 @@ def render_qa(qa: QA) -> rx.Component:
             margin_left="auto",
         ),
         rx.cond(
-            qa.tool_uses,
+            tool_uses,
             rx.foreach(
-                qa.tool_uses,
+                tool_uses,
                 render_tool_use,
             ),
         ),
         rx.box(
             rx.markdown(
-                qa.answer,
+                answer,
                 background_color=rx.color("accent", 4),
                 color=rx.color("accent", 12),
                 style=rx.Style(message_style),
@@ -89,6 +103,13 @@ def chat() -> rx.Component:
         rx.center(
             rx.box(
                 rx.foreach(State.chats[State.current_chat], render_qa),
+                # The answer being streamed is kept separate until it is finished
+                rx.cond(
+                    State.is_streaming_current_chat,
+                    render_question_answer(
+                        State.question, State.streaming_tool_uses, State.streaming_answer
+                    ),
+                ),
                 max_width="50em",
             ),
             width="100%",
@@ -22,7 +22,18 @@ from langgraph.store.memory import InMemoryStore
 # from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver, AsyncShallowPostgresSaver
 # from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
 # from langgraph.store.postgres import AsyncPostgresStore
-from mcp_chat.mcp_client import MultiMCPClient, SSEConnection, StdioConnection
+from mcp_chat.checkpointer import BoundedMemorySaver
+from mcp_chat.mcp_client import (
+    MCPSessionPool,
+    MultiMCPClient,
+    SSEConnection,
+    StdioConnection,
+    ToolCallLimiter,
+    ToolCallLimits,
+    ToolCatalog,
+    ToolResultCache,
+)
+from mcp_chat.message_cache import MessageCache
 
 # Load .env file into environment variables (so they can be used in config.yml)
 load_dotenv()
@@ -85,6 +96,45 @@ def config_option_to_connections(
     return connections
 
 
+def config_option_to_call_limits(
+    simple_config_dict: dict[str, dict[str, Any]],
+) -> dict[str, ToolCallLimits]:
+    """Get the tool call limits for each server from the mcp config (defaults if not specified).
+
+    Args:
+        - The full mcp connections config as loaded from config.yaml
+
+    Returns:
+        - The tool call limits per server name.
+    """
+    defaults = ToolCallLimits()
+    return {
+        name: ToolCallLimits(
+            max_in_flight=int(conf.get("max_in_flight", defaults.max_in_flight)),
+            timeout_s=float(conf.get("call_timeout_s", defaults.timeout_s)),
+        )
+        for name, conf in simple_config_dict.items()
+    }
+
+
+def config_option_to_lazy_servers(
+    simple_config_dict: dict[str, dict[str, Any]],
+) -> dict[str, float]:
+    """Get the servers to start on demand from the mcp config.
+
+    Args:
+        - The full mcp connections config as loaded from config.yaml
+
+    Returns:
+        - The idle shutdown time (in seconds) per lazy server name.
+    """
+    return {
+        name: float(conf.get("idle_shutdown_s", 300))
+        for name, conf in simple_config_dict.items()
+        if conf.get("lazy", False)
+    }
+
+
 ## For Sqlite checkpointer (no store)
 # class AsyncSqliteConn(resources.AsyncResource):
 #     async def init(self, conn_string: str) -> aiosqlite.Connection:
@@ -126,28 +176,59 @@ class Application(containers.DeclarativeContainer):
     )
     "Initialize logging from config (validating the parameters)"
 
+    mcp_connections = providers.Singleton(
+        config_option_to_connections,
+        config.mcp_servers,
+    )
+    "Connection configurations for each MCP server"
+
+    tool_catalog = providers.Singleton(ToolCatalog, path=config.tool_catalog.path)
+    "Tools of each MCP server (kept up to date by the session pool and persisted to disk)"
+
+    mcp_session_pool = providers.Singleton(
+        MCPSessionPool,
+        connections=mcp_connections,
+        catalog=tool_catalog,
+        lazy_servers=providers.Callable(config_option_to_lazy_servers, config.mcp_servers),
+    )
+    """App-scoped long-lived sessions to the MCP servers (started in the app lifespan, or lazily on
+    first use)"""
+
+    tool_call_limiter = providers.Singleton(
+        ToolCallLimiter,
+        limits=providers.Callable(config_option_to_call_limits, config.mcp_servers),
+    )
+    "Per-server concurrency limits and timeouts for tool calls"
+
+    tool_result_cache = providers.Singleton(
+        ToolResultCache,
+        ttls=config.tool_result_cache.ttls,
+        max_entries=config.tool_result_cache.max_entries,
+    )
+    "Cached results of idempotent tool calls (only for tools allowlisted in config)"
+
     mcp_client = providers.Factory(
         MultiMCPClient,
-        connections=providers.Singleton(
-            config_option_to_connections,
-            config.mcp_servers,
-        ),
+        connections=mcp_connections,
+        session_pool=mcp_session_pool,
+        call_limiter=tool_call_limiter,
     )
     "Single interface for working with multiple MCP clients"
 
     llm_models = providers.Dict(
-        openai_gpt4o=providers.Factory(
+        openai_gpt4o=providers.Singleton(
             ChatOpenAI,
             model="gpt-4o",
             api_key=config.secrets.OPENAI_API_KEY,
         ),
-        anthropic_claude_sonnet=providers.Factory(
+        anthropic_claude_sonnet=providers.Singleton(
             ChatAnthropic,
             model="claude-3-7-sonnet-latest",
             api_key=config.secrets.ANTHROPIC_API_KEY,
         ),
     )
-    "The main LLM model to use for completions"
+    """The main LLM model to use for completions (singletons so that tool bindings can be reused
+    across runs)"""
 
     ## For longer persistence a database is required
     # conn = providers.Resource(AsyncSqliteConn, config.checkpoint_db)
@@ -155,7 +236,25 @@ class Application(containers.DeclarativeContainer):
     "Connection to the database for persistent storage"
 
     ## CHECKPOINTERS -- For persistence of langgraph runs
-    checkpointer = providers.Resource(MemorySaver)
+    checkpointer = providers.Selector(
+        config.checkpointer.mode,
+        memory=providers.Resource(MemorySaver),
+        bounded=providers.Singleton(
+            BoundedMemorySaver,
+            max_threads=config.checkpointer.max_threads,
+            ttl_s=config.checkpointer.ttl_s,
+            max_bytes=config.checkpointer.max_bytes,
+        ),
+        # Only the latest checkpoint of each thread (enough to continue a conversation's thread)
+        shallow=providers.Singleton(
+            BoundedMemorySaver,
+            max_threads=config.checkpointer.max_threads,
+            ttl_s=config.checkpointer.ttl_s,
+            max_bytes=config.checkpointer.max_bytes,
+            shallow=True,
+        ),
+        none=providers.Object(None),
+    )
     # checkpointer = providers.Resource(AsyncSqliteSaver, conn=conn)
     # checkpointer = providers.Resource(AsyncPostgresSaver, conn=conn)
     # checkpointer = providers.Resource(AsyncShallowPostgresSaver, conn=conn)  # No timetravel
@@ -166,6 +265,12 @@ class Application(containers.DeclarativeContainer):
     # store = providers.Resource(AsyncPostgresStore, conn=conn)
     "Persistence provider for langgraph data (e.g. enables persisting data between runs)"
 
+    message_cache = providers.Singleton(
+        MessageCache,
+        max_bytes=config.message_cache.max_bytes,
+    )
+    "In-process LRU cache of deserialized conversation messages (in front of the store)"
+
     wiring_config = containers.WiringConfiguration(
         modules=[
             ".mcp_chat",
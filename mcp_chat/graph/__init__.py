@@ -1,5 +1,17 @@
 from .functional_implementation import make_graph as make_functional_graph
+from .graph_cache import clear_graph_cache, get_graph
 from .graph_implementation import make_graph as make_standard_graph
-from .langgraph_adapters import GraphRunAdapter
+from .langgraph_adapters import GraphRunAdapter, thread_id_for
+from .summarization import wait_for_summaries
+from .tool_binding import clear_bound_model_cache
 
-__all__ = ["GraphRunAdapter", "make_standard_graph", "make_functional_graph"]
+__all__ = [
+    "GraphRunAdapter",
+    "clear_bound_model_cache",
+    "clear_graph_cache",
+    "get_graph",
+    "make_standard_graph",
+    "make_functional_graph",
+    "thread_id_for",
+    "wait_for_summaries",
+]
@@ -0,0 +1,181 @@
+"""Accumulation of streamed AI message chunks in linear time.
+
+Adding AIMessageChunks (`a + b`) makes a new chunk, copying the content and tool call args
+accumulated so far, so building up a long answer one token at a time is quadratic. Instead, the
+string parts of each chunk (text, content block text/json, tool call args) are collected in lists
+and only joined once the message is finished. Everything else (metadata, usage, etc.) is small and
+mostly empty, so it is kept only for the chunks that have it and merged once at the end by adding
+those (otherwise empty) chunks to the finished message.
+
+The result is the same as adding the chunks together.
+"""
+
+from typing import Any
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.messages.ai import add_ai_message_chunks
+from langchain_core.messages.tool import tool_call_chunk
+
+
+class _DictParts:
+    """A dict merged from many partial dicts (as langchain merges the dicts of chunks).
+
+    str values are concatenated (except "type", where the first is kept), dicts are merged
+    recursively and lists merged by the "index" of their dict elements.
+    """
+
+    def __init__(self) -> None:
+        self._values: dict[str, Any] = {}
+        "Values, or what they are built from (list of str parts, _DictParts or _ListParts)"
+
+    def add(self, partial: dict[str, Any]) -> None:
+        for key, value in partial.items():
+            existing = self._values.get(key)
+            if existing is None:
+                self._values[key] = _parts_of(value)
+            elif value is None:
+                continue
+            elif isinstance(existing, list):
+                if key != "type" and isinstance(value, str):
+                    existing.append(value)
+            elif isinstance(existing, _DictParts) and isinstance(value, dict):
+                existing.add(value)
+            elif isinstance(existing, _ListParts) and isinstance(value, list):
+                for element in value:
+                    existing.add(element)
+
+    def build(self) -> dict[str, Any]:
+        return {key: _build(value) for key, value in self._values.items()}
+
+
+class _ListParts:
+    """A list merged from many partial lists (dicts with the same int "index" are merged, e.g.
+    content blocks)."""
+
+    def __init__(self) -> None:
+        self.items: list[Any] = []
+        self._by_index: dict[int, _DictParts] = {}
+
+    def add(self, element: Any) -> _DictParts | None:  # noqa: ANN401
+        """Merge in the element.
+
+        Returns:
+            The new merged dict if the element is a dict and the first with its index.
+        """
+        if not isinstance(element, dict):
+            self.items.append(element)
+            return None
+        index = element.get("index")
+        if isinstance(index, int) and index in self._by_index:
+            self._by_index[index].add(element)
+            return None
+        item = _DictParts()
+        item.add(element)
+        self.items.append(item)
+        if isinstance(index, int):
+            self._by_index[index] = item
+        return item
+
+    def build(self) -> list[Any]:
+        return [item.build() if isinstance(item, _DictParts) else item for item in self.items]
+
+
+def _parts_of(value: Any) -> Any:  # noqa: ANN401
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        parts = _DictParts()
+        parts.add(value)
+        return parts
+    if isinstance(value, list):
+        list_parts = _ListParts()
+        for element in value:
+            list_parts.add(element)
+        return list_parts
+    return value
+
+
+def _build(parts: Any) -> Any:  # noqa: ANN401
+    if isinstance(parts, list):
+        return "".join(parts)
+    if isinstance(parts, (_DictParts, _ListParts)):
+        return parts.build()
+    return parts
+
+
+class AIMessageAccumulator:
+    """Collects the chunks of a streaming AI message (materializing the full message at the end)."""
+
+    def __init__(self, first: AIMessageChunk) -> None:
+        self._is_list = False
+        "Whether the content is a list (e.g. anthropic content blocks) rather than a str"
+        self._content: list[list[str] | _DictParts] = []
+        "Runs of str parts and content blocks (in order)"
+        self._blocks = _ListParts()
+        self._tool_call_chunks = _ListParts()
+        self._metadata: list[AIMessageChunk] = []
+        "Chunks with only the metadata of the chunks that had any"
+        self._example = first.example
+        self._id = first.id
+        self.add(first)
+
+    def add(self, chunk: AIMessageChunk) -> None:
+        content = chunk.content
+        if isinstance(content, str):
+            self._add_str(content)
+        else:
+            self._is_list = True
+            for element in content:
+                if isinstance(element, dict):
+                    block = self._blocks.add(element)
+                    if block is not None:
+                        self._content.append(block)
+                else:
+                    self._content.append([element])
+        for partial in chunk.tool_call_chunks:
+            self._tool_call_chunks.add(dict(partial))
+        if chunk.additional_kwargs or chunk.response_metadata or chunk.usage_metadata is not None:
+            self._metadata.append(
+                AIMessageChunk(
+                    content="",
+                    example=self._example,
+                    additional_kwargs=chunk.additional_kwargs,
+                    response_metadata=chunk.response_metadata,
+                    usage_metadata=chunk.usage_metadata,
+                )
+            )
+        if not self._id:
+            self._id = chunk.id
+
+    def _add_str(self, content: str) -> None:
+        last = self._content[-1] if self._content else None
+        if isinstance(last, list):
+            last.append(content)
+        elif content or last is None:
+            self._content.append([content])
+
+    def to_message(self) -> AIMessageChunk:
+        """The full message (as if all the chunks had been added together)."""
+        content: str | list[str | dict] = [
+            "".join(item) if isinstance(item, list) else item.build() for item in self._content
+        ]
+        if not self._is_list:
+            content = "".join(part for item in self._content for part in item)  # pyright: ignore[reportGeneralTypeIssues]
+        message = AIMessageChunk(
+            example=self._example,
+            content=content,
+            tool_call_chunks=[
+                tool_call_chunk(
+                    name=call.get("name"),
+                    args=call.get("args"),
+                    id=call.get("id"),
+                    index=call.get("index"),
+                )
+                for call in self._tool_call_chunks.build()
+            ],
+            id=self._id,
+        )
+        if not self._metadata:
+            return message
+        # (the metadata chunks have no content, so adding them only merges the metadata)
+        return add_ai_message_chunks(message, *self._metadata)
@@ -10,24 +10,33 @@ from langchain_core.messages import (
     AnyMessage,
     BaseMessage,
     HumanMessage,
-    SystemMessage,
     ToolMessage,
-    messages_from_dict,
-    messages_to_dict,
 )
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import BaseTool
 from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.func import entrypoint, task
-from langgraph.prebuilt import ToolNode
 from langgraph.pregel import Pregel
 from langgraph.store.base import BaseStore
 from pydantic import BaseModel
 
 from mcp_chat.containers import Application
 from mcp_chat.mcp_client import MultiMCPClient
+from mcp_chat.message_cache import MessageCache
 from mcp_chat.models import InputState
 
+from .history import get_max_history_tokens, select_history
+from .message_log import append_messages
+from .summarization import (
+    ConversationSnapshot,
+    load_conversation,
+    make_system_message,
+    summarize_in_background,
+)
+from .tool_binding import get_bound_model
+from .tool_execution import execute_tool_calls
+from .tool_selection import select_tools_for_model
+
 
 class GraphRunError(Exception):
     pass
@@ -37,36 +46,35 @@ class GraphRunError(Exception):
 async def load_previous_messages(
     conversation_id: str | None,
     store: BaseStore,
-) -> list[BaseMessage]:
-    previous_messages: list[BaseMessage] = []
-    if conversation_id:
-        loaded = await store.aget(namespace=("messages",), key=conversation_id)
-        if loaded:
-            logging.debug("Loaded previous messages")
-            previous_messages = messages_from_dict(loaded.value["messages"])
-    return previous_messages
+    previous: ConversationSnapshot | None = None,
+) -> ConversationSnapshot:
+    """Load the summary of the earliest turns (if summarized) and the messages after it.
+
+    Continues from the `previous` snapshot of the thread if the conversation's log hasn't changed.
+    """
+    if not conversation_id:
+        return previous or ConversationSnapshot()
+    snapshot = await load_conversation(store, conversation_id, previous)
+    logging.debug(f"Loaded {len(snapshot.messages)} previous messages")
+    return snapshot
 
 
 @task
+@inject
 async def save_messages(
     store: BaseStore,
     conversation_id: str,
-    previous_messages: Sequence[BaseMessage],
     question: str,
     responses: Sequence[BaseMessage],
-) -> None:
-    await store.aput(
-        namespace=("messages",),
-        key=conversation_id,
-        value={
-            "messages": messages_to_dict(
-                [
-                    *previous_messages,
-                    HumanMessage(question),
-                    *responses,
-                ]
-            )
-        },
+    message_cache: MessageCache = Provide[Application.message_cache],
+) -> int:
+    """Append the messages of this turn to the conversation log.
+
+    Returns:
+        The new length of the log.
+    """
+    return await append_messages(
+        store, conversation_id, [HumanMessage(question), *responses], cache=message_cache
     )
 
 
@@ -75,75 +83,106 @@ async def call_tools(tool_call_message: AIMessage, tools: Sequence[BaseTool]) ->
     if not tool_call_message.tool_calls:
         raise GraphRunError("No tool calls found in the AI message.")
 
-    messages_state = await ToolNode(tools=tools, name="tool_node").ainvoke(
-        input={"messages": [tool_call_message]}
-    )
-    results = messages_state["messages"]
-    assert all(isinstance(result, ToolMessage) for result in results)
-    return results
+    return await execute_tool_calls(tool_call_message.tool_calls, tools)
 
 
 class OutputState(BaseModel):
     response_messages: Sequence[AnyMessage]
 
 
+@inject
+def get_chat_model(
+    model_name: str | None = None,
+    default_model: str = Provide[Application.config.default_model],
+    available_models: dict[str, BaseChatModel] = Provide[Application.llm_models],
+) -> tuple[str, BaseChatModel]:
+    """Get the name and chat model for a run.
+
+    Resolved per run (rather than when the graph is made) so that compiled graphs can be reused.
+    """
+    model_name = model_name or default_model
+    return model_name, available_models[model_name]
+
+
+@inject
+def get_mcp_client(
+    mcp_client: MultiMCPClient = Provide[Application.mcp_client],
+) -> MultiMCPClient:
+    """Get the mcp client for a run (resolved per run so that compiled graphs can be reused)."""
+    return mcp_client
+
+
 @inject
 async def make_graph(
-    checkpointer: BaseCheckpointSaver = Provide[Application.checkpointer],
+    checkpointer: BaseCheckpointSaver | None = Provide[Application.checkpointer],
     store: BaseStore = Provide[Application.store],
     system_prompt: str = Provide[Application.config.system_prompt],
-    mcp_client: MultiMCPClient = Provide[Application.mcp_client],
-    default_model: str = Provide[Application.config.default_model],
-    available_models: dict[str, BaseChatModel] = Provide[Application.llm_models],
     max_iterations: int = 10,
 ) -> Pregel:
     """Create a graph with the given checkpointer and store.
 
     This closure is partly required because of the dependency injection of the checkpointer and
     store, but it's also a nice way to be able to make configurable graphs.
+
+    Only things that are fixed for the lifetime of the app are captured here (the mcp client and
+    chat model are resolved per run), so the compiled graph can be cached and reused.
     """
 
     @entrypoint(checkpointer=checkpointer, store=store)
     async def graph(
         inputs: InputState,
+        *,
+        previous: ConversationSnapshot | None = None,
         store: BaseStore,
         config: RunnableConfig,
-    ) -> OutputState:
+    ) -> entrypoint.final[OutputState, ConversationSnapshot | None]:
         responses: list[AIMessage | ToolMessage] = []
         question = inputs.question
         logging.debug(f"Processing question: {question}")
 
-        async with mcp_client as client:
+        async with get_mcp_client() as client:
             tools = await client.get_tools()
-            chat_model = available_models[
-                config.get("configurable", {}).get("model_name", default_model)
-            ]
-            model = chat_model.bind_tools(tools)
+            model_name, chat_model = get_chat_model(
+                config.get("configurable", {}).get("model_name")
+            )
+            max_history_tokens = get_max_history_tokens(model_name)
 
-            previous_messages = await load_previous_messages(
-                conversation_id=inputs.conversation_id, store=store
+            # (the snapshot saved by the last run on this thread, if any, is reused if current)
+            snapshot: ConversationSnapshot = await load_previous_messages(  # pyright: ignore[reportGeneralTypeIssues]
+                conversation_id=inputs.conversation_id, store=store, previous=previous
+            )
+            summary, previous_messages = snapshot.summary, snapshot.messages
+
+            # Only the tools most relevant to the question (or used recently) are bound (all can
+            #  still be run)
+            model = get_bound_model(
+                model_name,
+                chat_model,
+                select_tools_for_model(model_name, tools, question, previous_messages),
             )
 
-            message_history: list[BaseMessage] = [
-                SystemMessage(system_prompt),
-                *previous_messages,
-                HumanMessage(question),
-            ]
+            system_message = make_system_message(system_prompt, summary)
+            question_message = HumanMessage(question)
 
             # Loop calling ai -> tools -> ai ... until no more tool calls or max iterations
             for i in range(max_iterations):
                 logging.debug(f"Iteration {i}")
 
+                # Older turns are dropped if the history would exceed the model's token budget
+                message_history = select_history(
+                    system_message,
+                    previous_messages,
+                    [question_message, *responses],
+                    max_tokens=max_history_tokens,
+                )
                 ai_message: BaseMessage = await model.ainvoke(input=message_history)
                 assert isinstance(ai_message, AIMessage)
-                message_history.append(ai_message)
                 responses.append(ai_message)
 
                 if not ai_message.tool_calls:
                     break
 
                 tool_responses: list[ToolMessage] = await call_tools(ai_message, tools=tools)
-                message_history.extend(tool_responses)
                 responses.extend(tool_responses)
             else:
                 logging.debug("Max iterations reached")
@@ -154,15 +193,21 @@ async def make_graph(
                 )
 
         # Save the messages to the store
+        log_length: int | None = None
         if inputs.conversation_id:
-            await save_messages(
+            log_length = await save_messages(
                 store=store,
                 conversation_id=inputs.conversation_id,
-                previous_messages=previous_messages,
                 question=question,
                 responses=responses,
             )
-
-        return OutputState(response_messages=responses)
+            # In the background, so the run (and the UI waiting on it) isn't held up
+            summarize_in_background(store, inputs.conversation_id, chat_model)
+
+        return entrypoint.final(
+            value=OutputState(response_messages=responses),
+            # For the next run on this thread (a new summary is picked up by load_conversation)
+            save=snapshot.with_turn([question_message, *responses], log_length),
+        )
 
     return graph
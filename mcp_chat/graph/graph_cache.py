@@ -0,0 +1,60 @@
+"""Reuse of compiled graphs across requests.
+
+Making a graph re-resolves its dependencies and rebuilds (and for the standard graph, recompiles)
+it, so graphs are instead made once per graph mode and reused. Everything that varies per request
+(the chat model, mcp client and tools) is resolved while the graph runs, so a compiled graph only
+needs remaking if one of the dependencies it was made with changes.
+"""
+
+from typing import Literal
+
+from dependency_injector.wiring import Provide, inject
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.pregel import Pregel
+from langgraph.store.base import BaseStore
+
+from mcp_chat.containers import Application
+
+from .functional_implementation import make_graph as make_functional_graph
+from .graph_implementation import make_graph as make_standard_graph
+from .instance_cache import InstanceCache
+
+GraphMode = Literal["functional", "standard"]
+
+MAX_GRAPHS = 4
+_compiled_graphs: InstanceCache[Pregel] = InstanceCache(MAX_GRAPHS)
+
+
+@inject
+async def get_graph(
+    graph_mode: GraphMode,
+    checkpointer: BaseCheckpointSaver | None = Provide[Application.checkpointer],
+    store: BaseStore = Provide[Application.store],
+    system_prompt: str = Provide[Application.config.system_prompt],
+) -> Pregel:
+    """Get the compiled graph for the mode, only making it if not already cached.
+
+    A new graph is made if the config or dependencies it was made with have changed.
+    """
+    dependencies = (checkpointer, store)
+    key = (graph_mode, system_prompt)
+    cached = _compiled_graphs.get(dependencies, key)
+    if cached is not None:
+        return cached
+
+    match graph_mode:
+        case "functional":
+            graph = await make_functional_graph(
+                checkpointer=checkpointer, store=store, system_prompt=system_prompt
+            )
+        case "standard":
+            graph = await make_standard_graph(checkpointer=checkpointer, store=store)
+        case _:
+            raise ValueError(f"Unknown graph mode: {graph_mode}")
+    _compiled_graphs.put(dependencies, graph, key)
+    return graph
+
+
+def clear_graph_cache() -> None:
+    """Drop all cached graphs (e.g. after changing how graphs are made)."""
+    _compiled_graphs.clear()
@@ -10,17 +10,14 @@ from langchain_core.messages import (
     AnyMessage,
     BaseMessage,
     HumanMessage,
-    SystemMessage,
-    messages_from_dict,
-    messages_to_dict,
+    RemoveMessage,
 )
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import BaseTool
 from langgraph.checkpoint.base import BaseCheckpointSaver
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph import StateGraph, add_messages
+from langgraph.graph import START, StateGraph, add_messages
 from langgraph.graph.graph import CompiledGraph
-from langgraph.prebuilt import ToolNode
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
 from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
 from langgraph.types import Command
@@ -28,8 +25,21 @@ from pydantic import BaseModel
 
 from mcp_chat.containers import Application
 from mcp_chat.mcp_client import MultiMCPClient
+from mcp_chat.message_cache import MessageCache
 from mcp_chat.models import InputState
 
+from .history import get_max_history_tokens, select_history
+from .message_log import append_messages
+from .summarization import (
+    ConversationSnapshot,
+    load_conversation,
+    make_system_message,
+    summarize_in_background,
+)
+from .tool_binding import get_bound_model
+from .tool_execution import execute_tool_calls
+from .tool_selection import select_tools_for_model
+
 
 class FullGraphState(BaseModel):
     """Full state used by and returned by graph."""
@@ -37,35 +47,74 @@ class FullGraphState(BaseModel):
     question: str
     previous_messages: list[BaseMessage] = []
     response_messages: Annotated[list[AnyMessage], add_messages]
-    tools: list[BaseTool] = []
+    summary: str | None = None
+    "Summary of the earliest turns of the conversation (not included in previous_messages)"
+    tool_names: list[str] = []
+    "Names of the tools available for this run (tools themselves can't be checkpointed)"
+    conversation_id: str | None = None
+    snapshot: ConversationSnapshot | None = None
+    """The conversation's history as of the loading (then the end) of the last run on this thread,
+    so that a run on the conversation's own thread can continue from its checkpoint"""
+
+
+class LoadMessagesInput(BaseModel):
+    question: str
     conversation_id: str | None = None
+    snapshot: ConversationSnapshot | None = None
 
 
 class LoadMessagesOutput(BaseModel):
     previous_messages: list[BaseMessage] = []
+    summary: str | None = None
+    response_messages: list[BaseMessage] = []
+    snapshot: ConversationSnapshot
 
 
 async def load_previous_messages(
-    state: InputState,
+    state: LoadMessagesInput,
     store: BaseStore,
 ) -> LoadMessagesOutput:
     question = state.question
     logging.debug(f"Processing question: {question}")
 
-    previous_messages: Sequence[BaseMessage] = []
     logging.debug(f"Conversation ID: {state.conversation_id}")
+    # (the snapshot saved by the last run on this thread, if any, is reused if still current)
     if state.conversation_id:
-        found = await store.aget(namespace=("messages",), key=state.conversation_id)
-        logging.debug(f"Found: {found}")
-        if found:
-            previous_messages = messages_from_dict(found.value["messages"])
+        snapshot = await load_conversation(store, state.conversation_id, state.snapshot)
+        logging.debug(f"Loaded {len(snapshot.messages)} previous messages")
     else:
-        previous_messages = []
+        snapshot = state.snapshot or ConversationSnapshot()
     return LoadMessagesOutput(
-        previous_messages=previous_messages,
+        previous_messages=list(snapshot.messages),
+        summary=snapshot.summary,
+        # Responses of the last run on this thread (if any) are now part of the previous messages
+        response_messages=[RemoveMessage(id=REMOVE_ALL_MESSAGES)],
+        snapshot=snapshot,
     )
 
 
+class LoadToolsOutput(BaseModel):
+    tool_names: list[str] = []
+
+
+@inject
+async def load_tools(
+    state: InputState,
+    mcp_client: MultiMCPClient = Provide[Application.mcp_client],
+) -> LoadToolsOutput:
+    """Discover the available tools once per run (later nodes look them up by name)."""
+    _ = state
+    async with mcp_client as client:
+        tools = await client.get_tools()
+    return LoadToolsOutput(tool_names=[tool.name for tool in tools])
+
+
+def get_run_tools(mcp_client: MultiMCPClient, tool_names: Sequence[str]) -> list[BaseTool]:
+    """Get the tools discovered at the start of the run (from the already loaded session pool)."""
+    tools_by_name = {tool.name: tool for tool in mcp_client.session_pool.get_tools()}
+    return [tools_by_name[name] for name in tool_names if name in tools_by_name]
+
+
 class CallLLMOutput(BaseModel):
     response_messages: list[BaseMessage] = []
 
@@ -79,20 +128,23 @@ async def call_llm(
     default_model: str = Provide[Application.config.default_model],
     system_prompt: str = Provide[Application.config.system_prompt],
 ) -> Command[Literal["tool_node", "save_messages"]]:
-    if not state.tools:
-        async with mcp_client as client:
-            tools = await client.get_tools()
-    else:
-        tools = state.tools
-
-    chat_model = available_models[config.get("configurable", {}).get("model_name", default_model)]
-    model = chat_model.bind_tools(tools)
-    messages_history: list[BaseMessage] = [
-        SystemMessage(system_prompt),
-        *state.previous_messages,
-        HumanMessage(state.question),
-        *state.response_messages,
-    ]
+    tools = get_run_tools(mcp_client, state.tool_names)
+    model_name = config.get("configurable", {}).get("model_name", default_model)
+    # Only the tools most relevant to the question are bound (all can still be run)
+    model = get_bound_model(
+        model_name,
+        available_models[model_name],
+        select_tools_for_model(
+            model_name, tools, state.question, [*state.previous_messages, *state.response_messages]
+        ),
+    )
+    # Older turns are dropped if the history would exceed the model's token budget
+    messages_history = select_history(
+        make_system_message(system_prompt, state.summary),
+        state.previous_messages,
+        [HumanMessage(state.question), *state.response_messages],
+        max_tokens=get_max_history_tokens(model_name),
+    )
     response: BaseMessage = await model.ainvoke(input=messages_history)
     assert isinstance(response, AIMessage)
     update = CallLLMOutput(response_messages=[response])
@@ -102,29 +154,49 @@ async def call_llm(
     return Command(update=update, goto="save_messages")
 
 
+class SaveMessagesOutput(BaseModel):
+    snapshot: ConversationSnapshot | None = None
+
+
+@inject
 async def save_messages(
     state: FullGraphState,
     store: BaseStore,
-) -> None:
+    message_cache: MessageCache = Provide[Application.message_cache],
+) -> SaveMessagesOutput:
+    turn_messages = [HumanMessage(state.question), *state.response_messages]
+    log_length: int | None = None
     if state.conversation_id:
         logging.debug(f"Saving messages for conversation ID: {state.conversation_id}")
-        await store.aput(
-            namespace=("messages",),
-            key=state.conversation_id,
-            value={
-                "messages": messages_to_dict(
-                    state.previous_messages
-                    + [HumanMessage(state.question)]
-                    + state.response_messages
-                )
-            },
+        log_length = await append_messages(
+            store, state.conversation_id, turn_messages, cache=message_cache
         )
-    return
+    snapshot = state.snapshot or ConversationSnapshot()
+    # For the next run on this thread (a new summary is picked up by load_conversation)
+    return SaveMessagesOutput(snapshot=snapshot.with_turn(turn_messages, log_length))
+
+
+@inject
+async def summarize_history(
+    state: FullGraphState,
+    config: RunnableConfig,
+    store: BaseStore,
+    available_models: dict[str, BaseChatModel] = Provide[Application.llm_models],
+    default_model: str = Provide[Application.config.default_model],
+) -> None:
+    """Start summarizing the oldest turns of the conversation if it has become too long.
+
+    Runs after the messages are saved, and only starts the summary in the background so that the
+    run (and the UI waiting on it) isn't held up.
+    """
+    if state.conversation_id:
+        model_name = config.get("configurable", {}).get("model_name", default_model)
+        summarize_in_background(store, state.conversation_id, available_models[model_name])
 
 
 class ToolNodeInput(BaseModel):
     response_messages: list[BaseMessage]
-    tools: list[BaseTool]
+    tool_names: list[str]
 
 
 class ToolNodeOutput(BaseModel):
@@ -136,14 +208,12 @@ async def call_tools(
     state: ToolNodeInput,
     mcp_client: MultiMCPClient = Provide[Application.mcp_client],
 ) -> ToolNodeOutput:
-    async with mcp_client as client:
-        tools = await client.get_tools()
-        logging.debug("Calling tools")
-        messages_state = await ToolNode(tools=tools, name="tool_node").ainvoke(
-            input={"messages": state.response_messages.copy()}
-        )
-    results = messages_state["messages"]
-    return ToolNodeOutput(response_messages=results)
+    tools = get_run_tools(mcp_client, state.tool_names)
+    tool_call_message = state.response_messages[-1]
+    assert isinstance(tool_call_message, AIMessage)
+    logging.debug("Calling tools")
+    results = await execute_tool_calls(tool_call_message.tool_calls, tools)
+    return ToolNodeOutput(response_messages=list(results))
 
 
 @inject
@@ -152,23 +222,27 @@ async def make_graph(
     store: BaseStore | None = Provide[Application.store],
     debug_mode: bool = False,
 ) -> CompiledGraph:
-    checkpointer = checkpointer or MemorySaver()
     store = store or InMemoryStore()
 
     graph = StateGraph(state_schema=FullGraphState)
     graph.add_node("load_previous_messages", load_previous_messages)
+    graph.add_node("load_tools", load_tools)
     graph.add_node("call_llm", call_llm)
     graph.add_node("tool_node", call_tools)
     graph.add_node("save_messages", save_messages)
+    graph.add_node("summarize_history", summarize_history)
 
-    graph.set_entry_point("load_previous_messages")
-    graph.add_edge("load_previous_messages", "call_llm")
+    # Load history and discover tools concurrently, then start the llm <-> tools loop
+    graph.add_edge(START, "load_previous_messages")
+    graph.add_edge(START, "load_tools")
+    graph.add_edge(["load_previous_messages", "load_tools"], "call_llm")
     graph.add_edge("tool_node", "call_llm")
     # call_llm directs to tool_node or save_messages
-    graph.set_finish_point("save_messages")
+    graph.add_edge("save_messages", "summarize_history")
+    graph.set_finish_point("summarize_history")
 
     compiled_graph = graph.compile(
-        checkpointer=checkpointer,
+        checkpointer=checkpointer,  # None for no checkpoints (the "none" checkpointer mode)
         store=store,
         interrupt_before=None,
         interrupt_after=None,
@@ -0,0 +1,90 @@
+"""Selection of the conversation history to send to the model within a token budget.
+
+The system prompt and the current turn (the question plus any tool calls/responses so far) are
+always kept. Previous turns are then added newest first until the budget is used up. Whole turns
+are kept or dropped together, so tool calls are never separated from their tool responses.
+
+Token counts are approximate (based on characters), and cached per message id since the same
+messages are counted again every turn.
+"""
+
+from collections import OrderedDict
+from typing import Sequence
+
+from dependency_injector.wiring import Provide, inject
+from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+from mcp_chat.containers import Application
+
+MAX_CACHED_COUNTS = 50_000
+_token_counts: OrderedDict[str, int] = OrderedDict()
+
+
+def count_tokens(message: BaseMessage) -> int:
+    """Approximate number of tokens in a message (cached if the message has an id)."""
+    if message.id is None:
+        return count_tokens_approximately([message])
+    count = _token_counts.get(message.id)
+    if count is None:
+        count = count_tokens_approximately([message])
+        _token_counts[message.id] = count
+        if len(_token_counts) > MAX_CACHED_COUNTS:
+            _token_counts.popitem(last=False)
+    return count
+
+
+def clear_token_count_cache() -> None:
+    _token_counts.clear()
+
+
+def split_turns(messages: Sequence[BaseMessage]) -> list[list[BaseMessage]]:
+    """Split messages into turns that each start with a human message."""
+    turns: list[list[BaseMessage]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def select_history(
+    system_message: BaseMessage,
+    previous_messages: Sequence[BaseMessage],
+    current_messages: Sequence[BaseMessage],
+    max_tokens: int | None,
+) -> list[BaseMessage]:
+    """Select the messages to send to the model.
+
+    Args:
+        system_message: Always included first.
+        previous_messages: Messages of previous turns (oldest turns are dropped to fit the budget).
+        current_messages: Messages of the current turn (always included).
+        max_tokens: The token budget (None for no limit).
+    """
+    if max_tokens is None:
+        return [system_message, *previous_messages, *current_messages]
+
+    remaining = max_tokens - count_tokens(system_message)
+    remaining -= sum(count_tokens(message) for message in current_messages)
+    kept: list[list[BaseMessage]] = []
+    for turn in reversed(split_turns(previous_messages)):
+        remaining -= sum(count_tokens(message) for message in turn)
+        if remaining < 0:
+            break
+        kept.append(turn)
+    return [
+        system_message,
+        *(message for turn in reversed(kept) for message in turn),
+        *current_messages,
+    ]
+
+
+@inject
+def get_max_history_tokens(
+    model_name: str | None = None,
+    default_model: str = Provide[Application.config.default_model],
+    budgets: dict[str, int] = Provide[Application.config.history_max_tokens],
+) -> int | None:
+    """Token budget for the prompt sent to the model (None if not configured for the model)."""
+    return (budgets or {}).get(model_name or default_model)
@@ -0,0 +1,49 @@
+"""Small LRU cache keyed by the identity of objects (e.g. tool instances, checkpointers).
+
+Used for things that are expensive to make from objects that are themselves reused (ToolNodes and
+BM25 indexes per set of tools, bound models per chat model, compiled graphs per checkpointer/store).
+"""
+
+from collections import OrderedDict
+from typing import Generic, Hashable, Iterable, TypeVar
+
+V = TypeVar("V")
+
+
+class InstanceCache(Generic[V]):
+    """LRU cache keyed by the identity of some objects (plus any hashable extras).
+
+    Each entry holds references to its key objects, so their ids can't be reused by new objects
+    while the entry exists.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._entries: OrderedDict[tuple, tuple[tuple[object, ...], V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _key(objects: tuple[object, ...], extra: Hashable) -> tuple:
+        return (tuple(id(obj) for obj in objects), extra)
+
+    def get(self, objects: Iterable[object], extra: Hashable = None) -> V | None:
+        key = self._key(tuple(objects), extra)
+        cached = self._entries.get(key)
+        if cached is None:
+            return None
+        self._entries.move_to_end(key)
+        return cached[1]
+
+    def put(self, objects: Iterable[object], value: V, extra: Hashable = None) -> None:
+        """Add the entry, dropping the least recently used beyond `max_size`."""
+        objects = tuple(objects)
+        key = self._key(objects, extra)
+        self._entries[key] = (objects, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
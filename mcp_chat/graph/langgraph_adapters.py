@@ -10,9 +10,18 @@ This also translates the lg events into more useful updates for triggering UI ev
 
 import logging
 import uuid
-from typing import Any, AsyncIterator, Iterator, Literal, Protocol, TypeGuard
+from typing import (
+    Any,
+    AsyncIterator,
+    Iterator,
+    Literal,
+    NamedTuple,
+    Protocol,
+    Sequence,
+    TypeGuard,
+)
 
-from dependency_injector.wiring import Provide
+from dependency_injector.wiring import Provide, inject
 from langchain_core.messages import (
     AIMessage,
     AIMessageChunk,
@@ -40,16 +49,24 @@ from mcp_chat.models import (
     UpdateTypes,
 )
 
+from .chunk_accumulator import AIMessageAccumulator
+
 STOP_KEYS = [
     "finish_reason",  # openai
     "stop_reason",  # anthropic
 ]
 
 
-class LgEvent(BaseModel):
-    """Structure of event emitted by langgraph."""
+LgStreamMode = Literal["values", "messages", "custom"]
+
+
+class LgEvent(NamedTuple):
+    """Structure of event emitted by langgraph.
 
-    mode: Literal["values", "messages"]
+    A plain tuple (not validated) since one is made for every streamed token.
+    """
+
+    mode: LgStreamMode
     data: Any
 
 
@@ -62,6 +79,10 @@ class GraphUpdateError(Exception):
 class EventsToUpdatesHandlerProtocol(Protocol):
     """Basic protocol for converting events to updates."""
 
+    stream_modes: Sequence[LgStreamMode] = ("messages", "values", "custom")
+    """Langgraph stream modes the handler uses events from (only these are requested from the
+    graph, e.g. "values" means a copy of the full graph state after every step)"""
+
     def handle_stream_event(self, event: LgEvent) -> Iterator[GraphUpdate]:
         """Take an event and return an iterable of updates."""
         raise NotImplementedError("handle_stream_event not implemented")
@@ -71,6 +92,25 @@ class EventsToUpdatesHandlerProtocol(Protocol):
         raise NotImplementedError("reset not implemented")
 
 
+@inject
+def thread_id_for(
+    conversation_id: str | None,
+    graph_mode: str,
+    session_id: str,
+    per_conversation: bool = Provide[Application.config.checkpointer.thread_per_conversation],
+) -> str:
+    """The thread to run the graph on for the conversation.
+
+    With `thread_per_conversation` each conversation has a stable thread per session (conversation
+    names aren't unique across sessions) and graph mode (their states differ), so a run continues
+    from the thread's last checkpoint (if the conversation's log hasn't changed since) and only adds
+    the new messages. Otherwise (or without a conversation) every run gets a new thread.
+    """
+    if per_conversation and conversation_id and session_id:
+        return f"{session_id}:{graph_mode}:{conversation_id}"
+    return str(uuid.uuid4())
+
+
 class GraphRunAdapter:
     """Adapter for running a langgraph graph and returning custom updates instead of langgraph events."""
 
@@ -120,15 +160,10 @@ class GraphRunAdapter:
         async for event in self.graph.astream(
             input=input,
             config=self._make_runnable_config(thread_id, llm_model),
-            stream_mode=[
-                "messages",
-                "values",
-            ],  # otherwise defaults to only "values" but we want message chunks
+            # Only the modes the handler uses (otherwise defaults to only "values")
+            stream_mode=list(stream_handler.stream_modes),
         ):
-            assert isinstance(event, tuple)
-            assert len(event) == 2
-            event = LgEvent(mode=event[0], data=event[1])
-            for update in stream_handler.handle_stream_event(event):
+            for update in stream_handler.handle_stream_event(LgEvent._make(event)):
                 yield update
 
         yield GeneralUpdate(type_=UpdateTypes.graph_end)
@@ -145,13 +180,20 @@ class GraphRunAdapter:
 class MessagesStreamHandler(EventsToUpdatesHandlerProtocol):
     """Convert a stream of message chunk events to updates."""
 
+    stream_modes = (
+        "messages",
+        "custom",  # Tool messages as each tool call completes
+    )
+
     def __init__(self, listen_nodes: list[str]) -> None:
         self.listen_nodes = listen_nodes
-        self.streaming_messages: dict[str, AIMessageChunk] = {}
+        self.streaming_messages: dict[str, AIMessageAccumulator] = {}
+        self.ended_tool_calls: set[str] = set()
 
     def reset(self) -> None:
         """Reset the handler for a new stream."""
         self.streaming_messages = {}
+        self.ended_tool_calls = set()
 
     def handle_stream_event(self, event: LgEvent) -> Iterator[GraphUpdate]:
         """Handle a stream event from the graph.
@@ -163,6 +205,11 @@ class MessagesStreamHandler(EventsToUpdatesHandlerProtocol):
             - ToolStartUpdate: After AI has made tool calls (single update for multiple calls)
             - ToolEndUpdate: With response from tool (an update per tool response)
         """
+        if event.mode == "custom":
+            # Tool messages are written to the custom stream as each tool call completes
+            if self.is_tool_message(event.data):
+                yield from self.make_tool_end_updates(event.data)
+            return
         if event.mode != "messages":
             # Ignore non-message events
             return
@@ -186,7 +233,7 @@ class MessagesStreamHandler(EventsToUpdatesHandlerProtocol):
                 yield AIStartUpdate(
                     m_id=m_id, metadata=GraphMetadata(node=lg_metadata["langgraph_node"])
                 )
-                self.streaming_messages[m_id] = m
+                self.streaming_messages[m_id] = AIMessageAccumulator(m)
             else:
                 self.update_streaming_message(m_id, m)
 
@@ -199,20 +246,25 @@ class MessagesStreamHandler(EventsToUpdatesHandlerProtocol):
                 pass
 
             if self.is_message_finish(m):
-                full_message = self.streaming_messages.pop(m_id)
+                full_message = self.streaming_messages.pop(m_id).to_message()
                 yield AIEndUpdate(m_id=m_id, response=full_message)
                 if self.has_tool_calls(full_message):
                     # update now because no other notification of tool calls until tool responses returned
                     yield self.make_tool_start_update(full_message)
 
         elif self.is_tool_message(m):
-            yield ToolEndUpdate(
-                tool_response=m,
-            )
+            yield from self.make_tool_end_updates(m)
         else:
             node = lg_metadata["langgraph_node"]
             logging.warning(f"Ignoring unexpected message update from: {node=}, {m.type=}")
 
+    def make_tool_end_updates(self, m: ToolMessage) -> Iterator[ToolEndUpdate]:
+        """Update for a tool response (unless already sent for the same tool call)."""
+        if m.tool_call_id in self.ended_tool_calls:
+            return
+        self.ended_tool_calls.add(m.tool_call_id)
+        yield ToolEndUpdate(tool_response=m)
+
     @staticmethod
     def is_ai_message(m: AnyMessage) -> TypeGuard[AIMessageChunk]:
         return isinstance(m, AIMessageChunk)
@@ -225,7 +277,8 @@ class MessagesStreamHandler(EventsToUpdatesHandlerProtocol):
         return m_id not in self.streaming_messages
 
     def update_streaming_message(self, m_id: str, m: AIMessageChunk) -> None:
-        self.streaming_messages[m_id] += m  # pyright: ignore[reportArgumentType]
+        # Chunks are only merged once the message finishes (adding them per token is quadratic)
+        self.streaming_messages[m_id].add(m)
 
     @staticmethod
     def has_content_chunk(m: AIMessageChunk) -> bool:
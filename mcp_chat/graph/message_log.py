@@ -0,0 +1,148 @@
+"""Append-only storage of conversation messages in the langgraph store.
+
+Each message is stored under its own key (a zero padded sequence index) in a per-conversation
+namespace, with a small head record holding the length of the log. Each turn then only writes its
+new messages, and reads can be limited to a range of the log, rather than rewriting and re-reading
+the whole history every turn.
+
+Layout:
+    ("messages",) / <conversation_id>: {
+        "length": <number of messages>,
+        "summary": <optional summary of the messages before summary_upto>,
+        "summary_upto": <seq of first message not included in the summary>,
+    }
+    ("messages", <conversation_id>) / <seq>: <serialized message>
+
+If a `MessageCache` is given, full loads of hot conversations are served from it without touching
+the store (so all writes must also be made with the same cache).
+"""
+
+import uuid
+from typing import Any, Sequence
+
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langgraph.store.base import BaseStore, GetOp, Item, PutOp
+
+from mcp_chat.message_cache import MessageCache, serialized_size
+
+HEAD_NAMESPACE = ("messages",)
+
+
+def log_namespace(conversation_id: str) -> tuple[str, ...]:
+    return (*HEAD_NAMESPACE, conversation_id)
+
+
+def seq_key(seq: int) -> str:
+    # Zero padded so that keys sort in sequence order
+    return f"{seq:010d}"
+
+
+async def get_head(store: BaseStore, conversation_id: str) -> dict[str, Any]:
+    head = await store.aget(namespace=HEAD_NAMESPACE, key=conversation_id)
+    return head.value if head else {"length": 0}
+
+
+async def get_log_length(store: BaseStore, conversation_id: str) -> int:
+    return (await get_head(store, conversation_id))["length"]
+
+
+async def load_summary(store: BaseStore, conversation_id: str) -> tuple[str | None, int]:
+    """Load the summary of the start of a conversation.
+
+    Returns:
+        The summary (None if not summarized) and the seq of the first message it doesn't cover.
+    """
+    head = await get_head(store, conversation_id)
+    return head.get("summary"), head.get("summary_upto", 0)
+
+
+async def save_summary(store: BaseStore, conversation_id: str, summary: str, upto: int) -> None:
+    """Save a summary of the messages of a conversation before `upto` (replacing any previous)."""
+    head = await get_head(store, conversation_id)
+    await store.aput(
+        HEAD_NAMESPACE, conversation_id, {**head, "summary": summary, "summary_upto": upto}
+    )
+
+
+async def _load_range(
+    store: BaseStore, conversation_id: str, start: int, end: int
+) -> tuple[list[BaseMessage], list[dict]]:
+    if start >= end:
+        return [], []
+    namespace = log_namespace(conversation_id)
+    items = await store.abatch([GetOp(namespace, seq_key(seq)) for seq in range(start, end)])
+    message_dicts = [item.value for item in items if isinstance(item, Item)]
+    return messages_from_dict(message_dicts), message_dicts
+
+
+async def load_messages(
+    store: BaseStore,
+    conversation_id: str,
+    start: int = 0,
+    end: int | None = None,
+    cache: MessageCache | None = None,
+) -> list[BaseMessage]:
+    """Load messages `start` to `end` (exclusive, default the end of the log) of a conversation.
+
+    A cached entry older than `end` (e.g. the log was appended to without the cache) is reloaded.
+    """
+    if cache is None:
+        length = await get_log_length(store, conversation_id)
+        end = length if end is None else min(end, length)
+        messages, _ = await _load_range(store, conversation_id, start, end)
+        return messages
+
+    cache_key = (store, conversation_id)
+    cached = cache.get(cache_key)
+    if cached is None or (end is not None and cached[0] < end):
+        # Cache the whole conversation so that later loads can be served from the cache
+        length = await get_log_length(store, conversation_id)
+        messages, message_dicts = await _load_range(store, conversation_id, 0, length)
+        cache.put(cache_key, length, messages, serialized_size(message_dicts))
+    else:
+        _, messages = cached
+    return messages[start:end]
+
+
+async def append_messages(
+    store: BaseStore,
+    conversation_id: str,
+    messages: Sequence[BaseMessage],
+    cache: MessageCache | None = None,
+) -> int:
+    """Append messages to the end of a conversation's log.
+
+    Returns:
+        The new length of the log.
+    """
+    head = await get_head(store, conversation_id)
+    length = head["length"]
+    if not messages:
+        return length
+    namespace = log_namespace(conversation_id)
+    new_length = length + len(messages)
+    # Every stored message gets an id (so that e.g. token counts can be cached per message)
+    messages = [
+        message if message.id else message.model_copy(update={"id": str(uuid.uuid4())})
+        for message in messages
+    ]
+    message_dicts = [message_to_dict(message) for message in messages]
+    await store.abatch(
+        [
+            *(
+                PutOp(namespace, seq_key(seq), message_dict)
+                for seq, message_dict in enumerate(message_dicts, start=length)
+            ),
+            # Head last so the new length is only visible once the messages are written
+            PutOp(HEAD_NAMESPACE, conversation_id, {**head, "length": new_length}),
+        ]
+    )
+    if cache is not None:
+        cache.extend(
+            (store, conversation_id),
+            from_version=length,
+            to_version=new_length,
+            messages=messages,
+            size=serialized_size(message_dicts),
+        )
+    return new_length
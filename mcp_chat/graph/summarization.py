@@ -0,0 +1,220 @@
+"""Rolling summarization of the oldest turns of long conversations.
+
+Once the unsummarized part of a conversation's log exceeds `trigger_tokens`, all but the most
+recent `keep_recent_turns` turns are folded into a running summary stored in the log's head record.
+Later loads then send the summary (as part of the system prompt) plus only the messages after it.
+
+Summarizing calls the model, so it is started in the background at the end of a graph run (at most
+one per conversation at a time) rather than as part of the run, which would keep the UI waiting for
+the run to finish. A later run picks up the new summary once it's saved (see `load_conversation`).
+"""
+
+import asyncio
+import contextvars
+import logging
+from functools import partial
+from typing import Any, Sequence
+
+from dependency_injector.wiring import Provide, inject
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AnyMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    get_buffer_string,
+)
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.store.base import BaseStore
+from pydantic import BaseModel
+
+from mcp_chat.containers import Application
+from mcp_chat.message_cache import MessageCache
+
+from .history import count_tokens, split_turns
+from .message_log import get_head, load_messages, load_summary, save_summary
+
+_summarizing: dict[tuple[BaseStore, str], asyncio.Task[bool]] = {}
+
+SUMMARIZE_PROMPT = """\
+Summarize the conversation below so that it can be continued without the original messages.
+Keep any facts, decisions, file paths, names and open questions that may be needed later. Be concise.
+"""
+
+
+def make_system_message(system_prompt: str, summary: str | None) -> SystemMessage:
+    """System message including the summary of earlier turns (if there is one)."""
+    if not summary:
+        return SystemMessage(system_prompt)
+    return SystemMessage(f"{system_prompt}\n\nSummary of the earlier conversation:\n{summary}")
+
+
+@inject
+def get_summarization_config(
+    summarization: dict[str, Any] = Provide[Application.config.summarization],
+) -> dict[str, Any]:
+    return summarization
+
+
+class ConversationSnapshot(BaseModel):
+    """The history of a conversation as of the end of a run.
+
+    Checkpointed so that the next run on the same thread can continue from it rather than reloading
+    the messages from the store (see `load_conversation`).
+    """
+
+    summary: str | None = None
+    messages: list[AnyMessage] = []
+    "Messages after the summary"
+    log_length: int = 0
+    "Length of the conversation's log that the snapshot is up to date with"
+    summary_upto: int = 0
+    "`summary_upto` of the log when the snapshot was loaded"
+
+    def with_turn(
+        self, messages: Sequence[BaseMessage], log_length: int | None
+    ) -> "ConversationSnapshot | None":
+        """The snapshot with a turn added.
+
+        Args:
+            messages: The messages of the turn.
+            log_length: Length of the log after appending the turn (None if there is no log).
+
+        Returns:
+            None if the log was also appended to by something else (so the snapshot is incomplete).
+        """
+        if log_length is None:
+            log_length = self.log_length
+        elif log_length != self.log_length + len(messages):
+            return None
+        return self.model_copy(
+            update={"messages": [*self.messages, *messages], "log_length": log_length}
+        )
+
+
+@inject
+async def load_conversation(
+    store: BaseStore,
+    conversation_id: str,
+    previous: ConversationSnapshot | None = None,
+    message_cache: MessageCache = Provide[Application.message_cache],
+) -> ConversationSnapshot:
+    """Load the summary (if enabled) and the messages after it.
+
+    The `previous` snapshot (e.g. checkpointed by the last run on the thread) is reused if the log
+    hasn't changed since (e.g. no turns from other threads, no new summary).
+    """
+    head = await get_head(store, conversation_id)
+    summary_upto = head.get("summary_upto", 0)
+    if (
+        previous is not None
+        and previous.log_length == head["length"]
+        and previous.summary_upto == summary_upto
+    ):
+        return previous
+
+    summary, upto = None, 0
+    if get_summarization_config()["enabled"]:
+        summary, upto = head.get("summary"), summary_upto
+    messages = await load_messages(
+        store, conversation_id, start=upto, end=head["length"], cache=message_cache
+    )
+    return ConversationSnapshot(
+        summary=summary,
+        messages=messages,  # pyright: ignore[reportArgumentType]  (concrete message types)
+        log_length=head["length"],
+        summary_upto=summary_upto,
+    )
+
+
+async def load_history(
+    store: BaseStore, conversation_id: str
+) -> tuple[str | None, list[BaseMessage]]:
+    """Load the summary (if summarization is enabled) and the messages not covered by it."""
+    snapshot = await load_conversation(store, conversation_id)
+    return snapshot.summary, list(snapshot.messages)
+
+
+async def summarize_messages(
+    chat_model: BaseChatModel, previous_summary: str | None, messages: Sequence[BaseMessage]
+) -> str:
+    conversation = get_buffer_string(messages)
+    if previous_summary:
+        conversation = f"Summary of the conversation so far:\n{previous_summary}\n\n{conversation}"
+    response = await chat_model.ainvoke(
+        [SystemMessage(SUMMARIZE_PROMPT), HumanMessage(conversation)],
+        # Not part of the answer, so don't stream it to the user
+        config={"tags": [TAG_NOSTREAM]},
+    )
+    return response.text()
+
+
+@inject
+async def update_summary(
+    store: BaseStore,
+    conversation_id: str,
+    chat_model: BaseChatModel,
+    message_cache: MessageCache = Provide[Application.message_cache],
+) -> bool:
+    """Summarize the oldest turns of the conversation if it has become too long.
+
+    Returns:
+        Whether the summary was updated.
+    """
+    config = get_summarization_config()
+    if not config["enabled"]:
+        return False
+
+    summary, upto = await load_summary(store, conversation_id)
+    messages = await load_messages(store, conversation_id, start=upto, cache=message_cache)
+    if sum(count_tokens(message) for message in messages) <= config["trigger_tokens"]:
+        return False
+
+    turns = split_turns(messages)
+    to_summarize = [
+        message for turn in turns[: len(turns) - config["keep_recent_turns"]] for message in turn
+    ]
+    if not to_summarize:
+        return False
+
+    summary = await summarize_messages(chat_model, summary, to_summarize)
+    await save_summary(store, conversation_id, summary, upto + len(to_summarize))
+    return True
+
+
+def summarize_in_background(
+    store: BaseStore, conversation_id: str, chat_model: BaseChatModel
+) -> asyncio.Task[bool] | None:
+    """Start `update_summary` for the conversation without waiting for it.
+
+    Returns:
+        The task (None if summarization is disabled, or the conversation is already being
+        summarized, in which case the next turn starts another if still needed).
+    """
+    if not get_summarization_config()["enabled"]:
+        return None
+    key = (store, conversation_id)
+    running = _summarizing.get(key)
+    if running is not None and not running.done():
+        return None
+    task = asyncio.create_task(
+        update_summary(store, conversation_id, chat_model),
+        name=f"summarize-{conversation_id}",
+        # Not part of the graph run that started it (e.g. its callbacks)
+        context=contextvars.Context(),
+    )
+    _summarizing[key] = task
+    task.add_done_callback(partial(_summary_done, key))
+    return task
+
+
+def _summary_done(key: tuple[BaseStore, str], task: asyncio.Task[bool]) -> None:
+    if _summarizing.get(key) is task:
+        del _summarizing[key]
+    if not task.cancelled() and (e := task.exception()) is not None:
+        logging.error(f"Failed to summarize conversation {key[1]}: {e!r}")
+
+
+async def wait_for_summaries() -> None:
+    """Wait for the summaries currently being made (e.g. before shutting down)."""
+    await asyncio.gather(*_summarizing.values(), return_exceptions=True)
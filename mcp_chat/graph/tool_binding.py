@@ -0,0 +1,86 @@
+"""Reuse of chat models that already have tools bound (and of the ToolNodes that run those tools).
+
+`bind_tools` converts every tool schema to the provider's format, which is wasted work when the
+same tools are bound to the same model for every turn (and every tool loop iteration). Bound models
+are instead cached per model (name and instance) and fingerprint of the tools they were bound with.
+Since a different subset of tools may be bound for each question (see `tool_selection`), several
+bindings are kept per model, with the least recently used dropped beyond `MAX_BOUND_MODELS` (e.g.
+stale bindings after the MCP servers' tool lists change).
+
+Similarly, a ToolNode builds its name -> tool mapping and internal runnable when constructed, so
+ToolNodes are cached per set of tool instances rather than made for every tool step.
+"""
+
+import hashlib
+import json
+from typing import Any, Sequence
+
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langgraph.prebuilt import ToolNode
+from pydantic import BaseModel
+
+from .instance_cache import InstanceCache
+
+BoundModel = Runnable[LanguageModelInput, BaseMessage]
+
+MAX_BOUND_MODELS = 32
+_bound_models: InstanceCache[BoundModel] = InstanceCache(MAX_BOUND_MODELS)
+
+MAX_TOOL_NODES = 8
+_tool_nodes: InstanceCache[ToolNode] = InstanceCache(MAX_TOOL_NODES)
+
+
+def _schema_of(tool: BaseTool) -> dict[str, Any] | None:
+    schema = tool.args_schema
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        return schema.model_json_schema()
+    return schema
+
+
+def tools_fingerprint(tools: Sequence[BaseTool]) -> str:
+    """Hash of the names, descriptions and argument schemas of the tools (order independent)."""
+    described = sorted(
+        (tool.name, tool.description, json.dumps(_schema_of(tool), sort_keys=True, default=str))
+        for tool in tools
+    )
+    return hashlib.sha256(json.dumps(described).encode()).hexdigest()
+
+
+def get_bound_model(
+    model_name: str, chat_model: BaseChatModel, tools: Sequence[BaseTool]
+) -> BoundModel:
+    """Get the chat model with the tools bound, only binding if not already cached.
+
+    Args:
+        model_name: Name the model is configured under.
+        chat_model: The model instance (re-bound if a different instance is given for the name).
+        tools: The tools to bind.
+    """
+    key = (model_name, tools_fingerprint(tools))
+    bound = _bound_models.get([chat_model], key)
+    if bound is None:
+        bound = chat_model.bind_tools(tools)
+        _bound_models.put([chat_model], bound, key)
+    return bound
+
+
+def get_tool_node(tools: Sequence[BaseTool]) -> ToolNode:
+    """Get a ToolNode for the tools, reusing one already made for the same tool instances.
+
+    The least recently used nodes are dropped beyond `MAX_TOOL_NODES` (e.g. old nodes after the
+    servers reconnect and the tools are remade).
+    """
+    tool_node = _tool_nodes.get(tools)
+    if tool_node is None:
+        tool_node = ToolNode(tools=tools, name="tool_node")
+        _tool_nodes.put(tools, tool_node)
+    return tool_node
+
+
+def clear_bound_model_cache() -> None:
+    """Drop all cached bound models and tool nodes."""
+    _bound_models.clear()
+    _tool_nodes.clear()
@@ -0,0 +1,77 @@
+"""Parallel execution of the tool calls of an AI message.
+
+Calls are dispatched concurrently, limited per MCP server (see `ToolCallLimiter`), and each tool
+message is written to the "custom" stream as soon as its call completes so that the UI can show
+progress rather than waiting for the slowest call. Results of allowlisted read-only tools are reused
+from the `ToolResultCache` without calling the server, and calling any other tool of a server drops
+its cached results (since it may have changed what they would return).
+"""
+
+import asyncio
+import logging
+from typing import Sequence
+
+from dependency_injector.wiring import Provide, inject
+from langchain_core.messages import ToolCall, ToolMessage
+from langchain_core.tools import BaseTool
+from langgraph.config import get_stream_writer
+
+from mcp_chat.containers import Application
+from mcp_chat.mcp_client import MultiMCPClient, ToolCallLimiter, ToolResultCache
+
+from .tool_binding import get_tool_node
+
+
+@inject
+async def execute_tool_calls(
+    tool_calls: Sequence[ToolCall],
+    tools: Sequence[BaseTool],
+    mcp_client: MultiMCPClient = Provide[Application.mcp_client],
+    limiter: ToolCallLimiter = Provide[Application.tool_call_limiter],
+    result_cache: ToolResultCache[ToolMessage] = Provide[Application.tool_result_cache],
+) -> list[ToolMessage]:
+    """Run the tool calls concurrently (within the per-server limits).
+
+    Must be called from within a graph node or task (to write to the stream).
+
+    Returns:
+        A tool message per call (in the same order as the calls).
+    """
+    server_of_tool = {tool_name: server_name for server_name, tool_name in mcp_client.tool_index}
+    tool_node = get_tool_node(tools)
+    write = get_stream_writer()
+
+    async def run_call(tool_call: ToolCall) -> ToolMessage:
+        server_name = server_of_tool.get(tool_call["name"])
+        cacheable = result_cache.is_cacheable(server_name, tool_call["name"])
+        if not cacheable and server_name is not None:
+            result_cache.invalidate_server(server_name)
+        cached = result_cache.get(server_name, tool_call["name"], tool_call["args"])
+        if cached is not None:
+            message = cached.model_copy(update={"tool_call_id": tool_call["id"], "id": None})
+            write(message)
+            return message
+
+        try:
+            # ToolNode handles unknown tools and tool errors by returning error messages
+            output = await limiter.run(server_name, lambda: tool_node.ainvoke([tool_call]))
+            message = output["messages"][0]
+        except TimeoutError:
+            timeout_s = limiter.limits_for(server_name).timeout_s
+            logging.warning(f"Tool call {tool_call['name']} timed out after {timeout_s}s")
+            message = ToolMessage(
+                content=f"Error: Tool call timed out after {timeout_s}s",
+                name=tool_call["name"],
+                tool_call_id=tool_call["id"] or "",
+                status="error",
+            )
+        assert isinstance(message, ToolMessage)
+        if not cacheable and server_name is not None:
+            # Again, in case reads that ran alongside cached results from before the change
+            result_cache.invalidate_server(server_name)
+        elif message.status == "success":
+            result_cache.put(server_name, tool_call["name"], tool_call["args"], message)
+        write(message)
+        return message
+
+    return list(await asyncio.gather(*(run_call(tool_call) for tool_call in tool_calls)))
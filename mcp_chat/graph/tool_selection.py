@@ -0,0 +1,181 @@
+"""Selection of the tools most relevant to a question before binding them to the model.
+
+With many MCP servers configured, binding every tool bloats every prompt with schemas (and slows the
+first token). Instead, tools are ranked against the question with BM25 over their names and
+descriptions, and only the `top_k` best plus any `pinned` tools (and tools called recently in the
+conversation) are bound. This is configured per model, and models without a config get all tools.
+
+The BM25 index is built once per set of tools (and cached like the ToolNodes, see `tool_binding`).
+All tools remain available to run, only the tools the model is told about are limited.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Sequence
+
+from dependency_injector.wiring import Provide, inject
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.tools import BaseTool
+
+from mcp_chat.containers import Application
+
+from .instance_cache import InstanceCache
+
+MAX_INDEXES = 8
+RECENT_MESSAGES = 20
+"Tools called within this many of the latest messages are always selected"
+
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+_STOP_WORDS = frozenset(
+    "a an and any are as at be by can do for from get how i in is it me my of on or that the "
+    "this to what which with you".split()
+)
+
+
+def _stem(word: str) -> str:
+    """Crude plural stripping (so that e.g. "commits" matches "commit")."""
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase, stemmed words of the text (splitting snake_case, kebab-case and camelCase).
+
+    Stop words are dropped.
+    """
+    words = (word.lower() for word in _WORD.findall(text))
+    return [_stem(word) for word in words if word not in _STOP_WORDS]
+
+
+class BM25Index:
+    """Okapi BM25 ranking of documents (tools) against a query."""
+
+    def __init__(
+        self, documents: Sequence[Sequence[str]], k1: float = 1.5, b: float = 0.75
+    ) -> None:
+        """Initializes the index.
+
+        Args:
+            documents: Tokens of each document.
+            k1: Term frequency saturation.
+            b: Document length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self._term_counts = [Counter(document) for document in documents]
+        self._lengths = [len(document) for document in documents]
+        self._average_length = sum(self._lengths) / len(documents) if documents else 0
+        document_frequency = Counter(term for counts in self._term_counts for term in counts)
+        self._idf = {
+            term: math.log(1 + (len(documents) - freq + 0.5) / (freq + 0.5))
+            for term, freq in document_frequency.items()
+        }
+
+    def scores(self, query: Sequence[str]) -> list[float]:
+        """Score of each document for the query (higher is more relevant)."""
+        terms = [term for term in set(query) if term in self._idf]
+        scores = []
+        for counts, length in zip(self._term_counts, self._lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self._average_length or 1))
+            score = 0.0
+            for term in terms:
+                freq = counts.get(term, 0)
+                if freq:
+                    score += self._idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            scores.append(score)
+        return scores
+
+
+_indexes: InstanceCache[BM25Index] = InstanceCache(MAX_INDEXES)
+
+
+def _tool_document(tool: BaseTool) -> list[str]:
+    # Name counted twice since it's a more reliable signal than the (often long) description
+    name = tokenize(tool.name)
+    return [*name, *name, *tokenize(tool.description)]
+
+
+def get_tool_index(tools: Sequence[BaseTool]) -> BM25Index:
+    """Get the BM25 index for the tools, reusing one already built for the same tool instances."""
+    index = _indexes.get(tools)
+    if index is None:
+        index = BM25Index([_tool_document(tool) for tool in tools])
+        _indexes.put(tools, index)
+    return index
+
+
+def clear_tool_index_cache() -> None:
+    _indexes.clear()
+
+
+def select_tools(
+    tools: Sequence[BaseTool],
+    question: str,
+    top_k: int | None,
+    pinned: Sequence[str] = (),
+) -> list[BaseTool]:
+    """The `top_k` tools most relevant to the question plus the pinned tools.
+
+    Args:
+        tools: All available tools.
+        question: The text to rank the tools against.
+        top_k: Max number of (unpinned) tools to select (None for all tools).
+        pinned: Names of tools that are always selected.
+
+    Returns:
+        The selected tools (in their original order).
+    """
+    # (pinned tools that aren't available don't count)
+    pinned_names = {tool.name for tool in tools} & set(pinned)
+    if top_k is None or len(tools) <= top_k + len(pinned_names):
+        return list(tools)
+
+    scores = get_tool_index(tools).scores(tokenize(question))
+    # Stable sort, so ties (e.g. no matching words) keep the original order
+    ranked = sorted(
+        (i for i, tool in enumerate(tools) if tool.name not in pinned_names),
+        key=lambda i: scores[i],
+        reverse=True,
+    )
+    selected = set(ranked[:top_k])
+    return [tool for i, tool in enumerate(tools) if i in selected or tool.name in pinned_names]
+
+
+@inject
+def get_tool_selection_config(
+    model_name: str | None = None,
+    default_model: str = Provide[Application.config.default_model],
+    selection: dict[str, dict[str, Any]] = Provide[Application.config.tool_selection],
+) -> tuple[int | None, list[str]]:
+    """The `top_k` and pinned tool names for the model (None top_k if all tools should be bound)."""
+    model_config = (selection or {}).get(model_name or default_model) or {}
+    return model_config.get("top_k"), list(model_config.get("pinned") or [])
+
+
+def recently_called_tools(messages: Sequence[BaseMessage]) -> list[str]:
+    """Names of the tools called within the last `RECENT_MESSAGES` messages."""
+    return [
+        tool_call["name"]
+        for message in messages[-RECENT_MESSAGES:]
+        if isinstance(message, AIMessage)
+        for tool_call in message.tool_calls
+    ]
+
+
+def select_tools_for_model(
+    model_name: str,
+    tools: Sequence[BaseTool],
+    question: str,
+    history: Sequence[BaseMessage] = (),
+) -> list[BaseTool]:
+    """The tools to bind to the model for the question (according to the model's config).
+
+    Tools called recently in the history are also selected (e.g. for follow-ups like "do that
+    again" that don't mention them).
+    """
+    top_k, pinned = get_tool_selection_config(model_name)
+    return select_tools(tools, question, top_k, [*pinned, *recently_called_tools(history)])
@@ -8,6 +8,7 @@ import reflex_chakra as rc
 from reflex.config import environment
 
 from mcp_chat.components import chat, navbar
+from mcp_chat.graph import wait_for_summaries
 from mcp_chat.state import State
 
 from .containers import Application
@@ -44,7 +45,12 @@ async def lifespan(container: Application) -> AsyncIterator[None]:
     coro_or_none = container.init_resources()
     if coro_or_none:
         await coro_or_none
+    # Connect to the MCP servers once up front (sessions are then reused by every request)
+    await container.mcp_session_pool().start()
     yield
+    # Let summaries started by the last runs be saved before the store is shut down
+    await wait_for_summaries()
+    await container.mcp_session_pool().stop()
     coro_or_none = container.shutdown_resources()
     if coro_or_none:
         await coro_or_none
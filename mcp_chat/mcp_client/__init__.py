@@ -1,5 +1,21 @@
 from langchain_mcp_adapters.client import SSEConnection, StdioConnection
 
-from .multi_mcp_client import MultiMCPClient
+from .call_limits import ToolCallLimiter, ToolCallLimits
+from .connection import MCPServerConnectionError
+from .multi_mcp_client import MCPToolCall, MultiMCPClient
+from .session_pool import MCPSessionPool
+from .tool_catalog import ToolCatalog
+from .tool_result_cache import ToolResultCache
 
-__all__ = ["MultiMCPClient", "SSEConnection", "StdioConnection"]
+__all__ = [
+    "MCPServerConnectionError",
+    "MCPSessionPool",
+    "MCPToolCall",
+    "MultiMCPClient",
+    "SSEConnection",
+    "StdioConnection",
+    "ToolCallLimiter",
+    "ToolCallLimits",
+    "ToolCatalog",
+    "ToolResultCache",
+]
@@ -0,0 +1,53 @@
+"""Per-server limits on concurrent tool calls.
+
+Tool calls to different servers run fully in parallel, but each server only gets up to
+`max_in_flight` calls at a time (e.g. a stdio server handles requests over a single pipe, so
+flooding it just queues calls behind each other while they count towards their timeouts).
+"""
+
+import asyncio
+from typing import Awaitable, Callable, NamedTuple, TypeVar
+
+T = TypeVar("T")
+
+
+class ToolCallLimits(NamedTuple):
+    max_in_flight: int = 4
+    "Max concurrent calls to the server"
+    timeout_s: float = 60
+    "Max time for a single call (not including time waiting for a free slot)"
+
+
+class ToolCallLimiter:
+    def __init__(
+        self,
+        limits: dict[str, ToolCallLimits],
+        default_limits: ToolCallLimits = ToolCallLimits(),
+    ) -> None:
+        """Initializes the limiter.
+
+        Args:
+            limits: Limits per server name.
+            default_limits: Limits for servers not in `limits` (and for tools with no server).
+        """
+        self.limits = limits
+        self.default_limits = default_limits
+        self._semaphores: dict[str | None, asyncio.Semaphore] = {}
+
+    def limits_for(self, server_name: str | None) -> ToolCallLimits:
+        if server_name is None:
+            return self.default_limits
+        return self.limits.get(server_name, self.default_limits)
+
+    async def run(self, server_name: str | None, call: Callable[[], Awaitable[T]]) -> T:
+        """Run the call once the server has a free slot.
+
+        Raises:
+            TimeoutError: If the call takes longer than the server's `timeout_s`.
+        """
+        limits = self.limits_for(server_name)
+        semaphore = self._semaphores.get(server_name)
+        if semaphore is None:
+            semaphore = self._semaphores[server_name] = asyncio.Semaphore(limits.max_in_flight)
+        async with semaphore:
+            return await asyncio.wait_for(call(), timeout=limits.timeout_s)
@@ -0,0 +1,64 @@
+"""Shared helpers for opening sessions to MCP servers."""
+
+import asyncio
+from contextlib import AsyncExitStack
+
+from langchain_mcp_adapters.client import SSEConnection, StdioConnection
+from mcp import ClientSession, StdioServerParameters, stdio_client
+from mcp.client.session import MessageHandlerFnT
+from mcp.client.sse import sse_client
+from mcp.types import InitializeResult
+
+
+class MCPServerConnectionError(Exception):
+    pass
+
+
+ErroredServers = dict[str, tuple[SSEConnection | StdioConnection, Exception]]
+
+
+async def open_session(
+    exit_stack: AsyncExitStack,
+    connection: SSEConnection | StdioConnection,
+    initialize_timeout_s: float,
+    message_handler: MessageHandlerFnT | None = None,
+) -> tuple[ClientSession, InitializeResult]:
+    """Open and initialize a session to a single server.
+
+    The transport and session contexts are entered on `exit_stack`, so the caller owns the lifetime
+    of the connection (and must close the stack from the same task that opened it).
+
+    Args:
+        message_handler: Optional handler for messages from the server (e.g. notifications).
+
+    Returns:
+        The session and the server's response to initialization (e.g. its name and version).
+    """
+    if connection["transport"] == "stdio":
+        params = StdioServerParameters(
+            command=connection["command"],
+            args=connection["args"],
+            env=connection.get("env"),
+            cwd=connection.get("cwd"),
+            encoding=connection.get("encoding", "utf-8"),
+            encoding_error_handler=connection.get("encoding_error_handler", "strict"),
+        )
+        read, write = await exit_stack.enter_async_context(stdio_client(params))
+    elif connection["transport"] == "sse":
+        read, write = await exit_stack.enter_async_context(
+            sse_client(
+                url=connection["url"],
+                headers=connection.get("headers"),
+                timeout=connection.get("timeout", 5),
+                sse_read_timeout=connection.get("sse_read_timeout", 60 * 5),
+            )
+        )
+    else:
+        raise ValueError(f"Unsupported transport: {connection['transport']}")
+
+    session_kwargs = dict(connection.get("session_kwargs") or {})
+    if message_handler is not None:
+        session_kwargs["message_handler"] = message_handler
+    session = await exit_stack.enter_async_context(ClientSession(read, write, **session_kwargs))
+    initialized = await asyncio.wait_for(session.initialize(), timeout=initialize_timeout_s)
+    return session, initialized
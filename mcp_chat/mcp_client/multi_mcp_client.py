@@ -1,130 +1,136 @@
 import asyncio
 import json
 import logging
+import time
 import uuid
-from typing import Any, AsyncContextManager, cast
+from contextlib import AsyncExitStack
+from typing import Any, NamedTuple, Sequence
 
-from langchain_core.messages.tool import ToolCall
+from langchain_core.messages import ToolMessage
+from langchain_core.messages.tool import tool_call
 from langchain_core.tools import StructuredTool
-from langchain_mcp_adapters.client import (
-    MultiServerMCPClient,
-    SSEConnection,
-    StdioConnection,
-)
-from langchain_mcp_adapters.tools import load_mcp_tools
-from mcp import ClientSession, InitializeResult, StdioServerParameters, stdio_client
-from mcp.client.sse import sse_client
+from langchain_mcp_adapters.client import SSEConnection, StdioConnection
 
+from .call_limits import ToolCallLimiter
+from .connection import ErroredServers, MCPServerConnectionError, open_session
+from .session_pool import MCPSessionPool
 
-class MCPServerConnectionError(Exception):
-    pass
 
+class ServerPingResult(NamedTuple):
+    """Result of health checking a single server."""
 
-class LCClientPatch(MultiServerMCPClient):
-    initialize_timeout_s: float = 5
+    latency_s: float | None
+    error: Exception | None
 
-    async def __aenter__(self) -> "LCClientPatch":
-        """Connect to all servers during context."""
-        await super().__aenter__()
-        return self
-
-    # added timeout on intiaializing a session
-    async def _initialize_session_and_load_tools(
-        self, server_name: str, session: ClientSession
-    ) -> None:
-        """Initialize a session and load tools from it.
-
-        Args:
-            server_name: Name to identify this server connection
-            session: The ClientSession to initialize
-        """
-        # Initialize the session
-        try:
-            # raise Exception
-            await asyncio.wait_for(session.initialize(), timeout=self.initialize_timeout_s)
-            # NOTE: The problem is that this may only get the timeout error.
-            #  The actual error ends up only getting caught in the exit stack
-            #  but there I can't know which server it was for. (my PR to mcp may help with this)
-        except Exception as e:
-            logging.error(f"Failed to initialize session for {server_name}: {e}")
-            return
-
-        self.sessions[server_name] = session
 
-        # Load tools from this server
-        server_tools = await load_mcp_tools(session)
-        self.server_name_to_tools[server_name] = server_tools
+class MCPToolCall(NamedTuple):
+    """A call of a tool on a specific server."""
 
-
-ErroredServers = dict[str, tuple[SSEConnection | StdioConnection, Exception]]
+    server_name: str
+    tool_name: str
+    args: dict[str, Any] = {}
 
 
 class MultiMCPClient:
-    def __init__(self, connections: dict[str, SSEConnection | StdioConnection]) -> None:
+    def __init__(
+        self,
+        connections: dict[str, SSEConnection | StdioConnection],
+        session_pool: MCPSessionPool | None = None,
+        precheck_connections: bool = False,
+        call_limiter: ToolCallLimiter | None = None,
+    ) -> None:
         """Initializes an adapter for multiple mcp clients.
 
         Args:
             connections: A dictionary mapping server names to connection configurations.
                 Each configuration can be either a StdioConnection or SSEConnection.
+            session_pool: Optional app-scoped pool of long-lived sessions. If given, the client
+                uses the pool's warm sessions. Otherwise, the client opens its own sessions for
+                the duration of its context.
+            precheck_connections: Health check every server with a separate short lived session
+                before connecting. Otherwise the check is done on the session that is then used
+                (so each server is only spawned and initialized once).
+            call_limiter: Optional per-server concurrency limits and timeouts for `call_tools`.
         """
-        self.connections = connections
-        self.lc_client: LCClientPatch = LCClientPatch(connections=connections)
+        # Copied because failed servers are removed (and the dict may be shared between clients)
+        self.connections = dict(connections)
+        self._owns_pool = session_pool is None
+        self.session_pool = session_pool or MCPSessionPool(connections=self.connections)
+        self.precheck_connections = precheck_connections
+        self.call_limiter = call_limiter
         self._context_depth = 0
         self.timeout = 1
-        self.errored_servers: ErroredServers = {}
-
-    async def ping_servers(self) -> dict[str, Exception]:
-        async def send_ping(
-            client_context_manager: AsyncContextManager,
-        ) -> InitializeResult:
-            async with client_context_manager as (read, write):
-                async with ClientSession(read, write) as session:
-                    init = await session.initialize()
-                    await session.send_ping()
-                    return init
-
-        errors: dict[str, Exception] = {}
-        for server_name, connection in self.connections.items():
-            try:
-                if connection["transport"] == "stdio":
-                    params = StdioServerParameters(
-                        command=connection["command"], args=connection["args"]
-                    )
-                    await asyncio.wait_for(
-                        send_ping(stdio_client(params)),
-                        timeout=self.timeout,
-                    )
-                if connection["transport"] == "sse":
-                    await asyncio.wait_for(
-                        send_ping(sse_client(url=connection["url"])),
-                        timeout=self.timeout,
-                    )
-            except Exception as e:
-                errors[server_name] = e
-        return errors
+        self.max_ping_concurrency = 8
+        self._errored_servers: ErroredServers = {}
+
+    @property
+    def errored_servers(self) -> ErroredServers:
+        """Servers that failed to connect along with the error."""
+        return {**self._errored_servers, **self.session_pool.errored_servers}
+
+    @property
+    def server_name_to_tools(self) -> dict[str, list[StructuredTool]]:
+        """Tools of the connected servers (must be within the client context)."""
+        return self.session_pool.server_name_to_tools
+
+    async def ping_servers(self) -> dict[str, ServerPingResult]:
+        """Open a short lived session to each server and ping it.
+
+        Servers are pinged concurrently (at most `max_ping_concurrency` at a time), so the total
+        time is roughly that of the slowest server rather than the sum of all of them.
+
+        Returns:
+            A dictionary mapping server names to the handshake latency or the error raised.
+        """
+        semaphore = asyncio.Semaphore(self.max_ping_concurrency)
+
+        async def send_ping(connection: SSEConnection | StdioConnection) -> float:
+            start = time.perf_counter()
+            async with AsyncExitStack() as stack:
+                session, _ = await open_session(
+                    stack, connection, initialize_timeout_s=self.timeout
+                )
+                await session.send_ping()
+            return time.perf_counter() - start
+
+        async def ping_server(connection: SSEConnection | StdioConnection) -> ServerPingResult:
+            async with semaphore:
+                try:
+                    latency = await asyncio.wait_for(send_ping(connection), timeout=self.timeout)
+                except Exception as e:
+                    return ServerPingResult(latency_s=None, error=e)
+                return ServerPingResult(latency_s=latency, error=None)
+
+        names = list(self.connections)
+        results = await asyncio.gather(*(ping_server(self.connections[name]) for name in names))
+        return dict(zip(names, results))
 
     async def check_connections(self) -> None:
         """Simple short lived connection to check servers are accessible.
 
-        Returns:
-            dict[str, Exception]: A dictionary mapping server names to any exceptions raised during connection.
+        Any servers that fail are removed from the connections (and recorded in `errored_servers`).
         """
-        errors = await self.ping_servers()
-        if errors:
-            for server_name, error in errors.items():
+        results = await self.ping_servers()
+        for server_name, result in results.items():
+            if result.error is not None:
                 logging.error(
-                    f"Failed to connect to {server_name}: {error} -- Removing from connections"
+                    f"Failed to connect to {server_name}: {result.error} -- Removing from connections"
                 )
                 conn = self.connections.pop(server_name)
-                self.errored_servers[server_name] = (conn, error)
+                self._errored_servers[server_name] = (conn, result.error)
+            else:
+                logging.debug(f"Pinged {server_name} in {result.latency_s:.3f}s")
 
     async def __aenter__(self) -> "MultiMCPClient":
         """Connects to all servers during context."""
         if self._context_depth < 0:
             raise RuntimeError("Context manager has already exited")
         if self._context_depth == 0:
-            await self.check_connections()
-            self.lc_client = await self.lc_client.__aenter__()
+            if self._owns_pool and self.precheck_connections:
+                await self.check_connections()
+            # Servers are connected concurrently, each initialized and pinged on the session that
+            # is then used (no-op if a shared pool is already running)
+            await self.session_pool.start()
         self._context_depth += 1
         return self
 
@@ -133,23 +139,37 @@ class MultiMCPClient:
         if self._context_depth <= 0:
             raise RuntimeError("Context manager has already exited")
         self._context_depth -= 1
-        if self._context_depth == 0:
-            await self.lc_client.__aexit__(exc_type, exc_value, traceback)
+        if self._context_depth == 0 and self._owns_pool:
+            await self.session_pool.stop()
 
     async def get_tools(self) -> list[StructuredTool]:
         """Get all tools available from all connected servers."""
-        # NOTE: lc loads on initial connection, so don't need to await here (in general it would be awaited though)
+        # NOTE: tools are loaded on initial connection, so don't need to await here
         async with self:
-            tools = self.lc_client.get_tools()
-        assert all(isinstance(tool, StructuredTool) for tool in tools)
-        return cast(list[StructuredTool], tools)
+            return [tool for tools in self.server_name_to_tools.values() for tool in tools]
 
     async def get_tools_by_server(self) -> dict[str, list[StructuredTool]]:
         """Get tools as dict of server name to tools."""
         async with self:
-            for all_tools in self.lc_client.server_name_to_tools.values():
-                assert all(isinstance(tool, StructuredTool) for tool in all_tools)
-            return cast(dict[str, list[StructuredTool]], self.lc_client.server_name_to_tools)
+            return self.server_name_to_tools
+
+    @property
+    def tool_index(self) -> dict[tuple[str, str], StructuredTool]:
+        """Tools of the connected servers by (server name, tool name)."""
+        return self.session_pool.tool_index
+
+    def get_tool(self, server_name: str, tool_name: str) -> StructuredTool:
+        """Look up a tool of a connected server."""
+        tool = self.tool_index.get((server_name, tool_name))
+        if tool is not None:
+            return tool
+        if server_name in self.errored_servers:
+            raise MCPServerConnectionError(
+                f"Server {server_name} failed to connect {self.errored_servers[server_name]}"
+            )
+        if server_name not in self.server_name_to_tools:
+            raise ValueError(f"Server {server_name} not in connected servers")
+        raise ValueError(f"Tool {tool_name} not found on server {server_name}")
 
     async def call_tool(self, server_name: str, tool_name: str, **kwargs) -> Any:  # noqa: ANN401, ANN003
         """Manually call a tool on a specific server.
@@ -159,28 +179,62 @@ class MultiMCPClient:
 
         Returns whatever the tool returns.
         """
-        if server_name not in self.lc_client.server_name_to_tools:
-            if server_name in self.errored_servers:
-                raise MCPServerConnectionError(
-                    f"Server {server_name} failed to connect {self.errored_servers[server_name]}"
-                )
-            raise ValueError(f"Server {server_name} not in connected servers")
+        (result,) = await self.call_tools([MCPToolCall(server_name, tool_name, kwargs)])
+        return result
+
+    async def call_tools(
+        self, calls: Sequence[MCPToolCall], return_exceptions: bool = False
+    ) -> list[Any]:
+        """Call many tools concurrently over the warm sessions.
+
+        Calls are subject to the per-server concurrency limits and timeouts of the `call_limiter`
+        (if the client has one).
+
+        Args:
+            calls: The tool calls to make.
+            return_exceptions: Return exceptions in place of results rather than raising the first.
+
+        Returns:
+            The result of each call (in the same order as the calls).
+        """
         async with self:
-            server_tools = self.lc_client.server_name_to_tools[server_name]
-            tool = next(t for t in server_tools if t.name == tool_name)
-            assert isinstance(tool, StructuredTool)
-            assert tool.coroutine is not None
-            tool_call = ToolCall(
-                name=tool_name,
-                args=kwargs,
-                id=str(uuid.uuid4()),
+            tools: list[StructuredTool | Exception] = []
+            for call in calls:
+                try:
+                    tools.append(self.get_tool(call.server_name, call.tool_name))
+                except (MCPServerConnectionError, ValueError) as e:
+                    if not return_exceptions:
+                        raise
+                    tools.append(e)
+
+            async def run_call(call: MCPToolCall, tool: StructuredTool | Exception) -> Any:  # noqa: ANN401
+                if isinstance(tool, Exception):
+                    return tool
+                if self.call_limiter is None:
+                    return await self._call(tool, call.args)
+                return await self.call_limiter.run(
+                    call.server_name, lambda: self._call(tool, call.args)
+                )
+
+            return await asyncio.gather(
+                *(run_call(call, tool) for call, tool in zip(calls, tools)),
+                return_exceptions=return_exceptions,
             )
-            tool_content = await tool.ainvoke(tool_call)
-            try:
-                return json.loads(tool_content)
-            except json.JSONDecodeError:
-                return tool_content
+
+    @staticmethod
+    async def _call(tool: StructuredTool, args: dict[str, Any]) -> Any:  # noqa: ANN401
+        tool_message = await tool.ainvoke(
+            tool_call(name=tool.name, args=args, id=str(uuid.uuid4()))
+        )
+        assert isinstance(tool_message, ToolMessage)
+        content = tool_message.content
+        if not isinstance(content, str):
+            return content
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            return content
 
     def set_connection_timeout(self, timeout_s: float) -> None:
         """Set the timeout for initializing a session."""
-        self.lc_client.initialize_timeout_s = timeout_s
+        self.session_pool.initialize_timeout_s = timeout_s
@@ -0,0 +1,478 @@
+"""App-scoped pool of long-lived MCP sessions.
+
+Each server gets a supervisor task that owns its connection (the stdio process or sse stream) for
+the lifetime of the app. This avoids spawning every server on every request, and lets dead
+connections be re-established in the background without the request path noticing (other than a
+short wait if a tool is called mid-reconnect).
+
+The supervisor also re-lists the server's tools when it sends a `tools/list_changed` notification
+(and periodically), keeping the tools and the `ToolCatalog` (if given) up to date.
+
+If the catalog already has a server's tools (e.g. restored from disk after a restart, see
+`ToolCatalog`), they are served from it straight away rather than holding up startup until the
+server has connected (at which point they are revalidated).
+
+Lazy servers are not started with the pool if their tools are already in the catalog. Their tools
+are served from the catalog, and the server is only spawned on the first actual tool call (then
+shut down again once idle).
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack
+from typing import Any, cast
+
+from langchain_core.tools import StructuredTool
+from langchain_mcp_adapters.client import SSEConnection, StdioConnection
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+from mcp import ClientSession, types
+from mcp.client.session import MessageHandlerFnT
+from mcp.shared.session import RequestResponder
+from mcp.types import CallToolResult, Tool
+
+from .connection import ErroredServers, MCPServerConnectionError, open_session
+from .tool_catalog import ToolCatalog, connection_key
+
+
+class _LiveSession:
+    """Stand-in for a ClientSession that forwards to the pool's current session for a server.
+
+    Tools are built against this rather than a specific session so that they keep working after
+    the pool reconnects to the server.
+    """
+
+    def __init__(self, pool: "MCPSessionPool", server_name: str) -> None:
+        self.pool = pool
+        self.server_name = server_name
+
+    async def call_tool(self, name: str, arguments: dict[str, Any] | None = None) -> CallToolResult:
+        return await self.pool.call_tool(self.server_name, name, arguments)
+
+
+class _PooledServer:
+    """Connection state for a single server in the pool."""
+
+    def __init__(
+        self,
+        name: str,
+        connection: SSEConnection | StdioConnection,
+        idle_shutdown_s: float | None = None,
+    ) -> None:
+        self.name = name
+        self.connection = connection
+        self.idle_shutdown_s = idle_shutdown_s
+        "Set for lazy servers (connected on demand and shut down after being idle this long)"
+        self.key = connection_key(connection)
+        self.server_version: str | None = None
+        self.session: ClientSession | None = None
+        self.tools: list[StructuredTool] = []
+        self.tool_schemas: list[Tool] = []
+        self.error: Exception | None = None
+        self.connected = asyncio.Event()
+        "Set while there is a live session"
+        self.attempted = asyncio.Event()
+        "Set once the first connection attempt has finished (successfully or not)"
+        self.tools_changed = asyncio.Event()
+        "Set when the server notifies that its list of tools has changed"
+        self.wanted = asyncio.Event()
+        "Set when a session is needed (lazy servers wait for this before connecting)"
+        self.connecting = asyncio.Event()
+        "Set while a connection attempt is in progress"
+        self.attempt_finished = asyncio.Event()
+        "Set once the latest connection attempt has finished (successfully or not)"
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        self.task: asyncio.Task | None = None
+
+    @property
+    def lazy(self) -> bool:
+        return self.idle_shutdown_s is not None
+
+    @property
+    def tools_visible(self) -> bool:
+        """Whether the tools are served (connected, or known and not failed to connect).
+
+        A lazy server's tools stay visible after it fails to start, since it is only retried when
+        one of them is called.
+        """
+        return self.connected.is_set() or (bool(self.tools) and (self.error is None or self.lazy))
+
+
+class MCPSessionPool:
+    def __init__(
+        self,
+        connections: dict[str, SSEConnection | StdioConnection],
+        initialize_timeout_s: float = 5,
+        health_check_interval_s: float = 30,
+        reconnect_delay_s: float = 1,
+        max_reconnect_delay_s: float = 60,
+        tools_refresh_interval_s: float = 300,
+        catalog: ToolCatalog | None = None,
+        lazy_servers: dict[str, float] | None = None,
+    ) -> None:
+        """Initializes a pool of long-lived sessions (nothing is connected until `start`).
+
+        Args:
+            connections: A dictionary mapping server names to connection configurations.
+            initialize_timeout_s: Timeout for initializing (and health checking) a session.
+            health_check_interval_s: How often to ping live sessions to detect dead servers.
+            reconnect_delay_s: Initial delay before reconnecting to a failed server (doubles on
+                each consecutive failure up to `max_reconnect_delay_s`).
+            tools_refresh_interval_s: How often to re-list the tools of live sessions (they are
+                also re-listed whenever a server notifies that they changed).
+            catalog: Optional catalog to keep updated with the tools of each server.
+            lazy_servers: Servers to only connect to on demand, mapped to how long they can be
+                idle before being shut down.
+        """
+        self.connections = connections
+        self.initialize_timeout_s = initialize_timeout_s
+        self.health_check_interval_s = health_check_interval_s
+        self.reconnect_delay_s = reconnect_delay_s
+        self.max_reconnect_delay_s = max_reconnect_delay_s
+        self.tools_refresh_interval_s = tools_refresh_interval_s
+        self.catalog = catalog
+        self.lazy_servers = lazy_servers or {}
+        self.version = 0
+        "Incremented whenever the set of live sessions or of servers with available tools changes"
+
+        self._servers: dict[str, _PooledServer] = {}
+        self._tool_index: dict[tuple[str, str], StructuredTool] = {}
+        self._tool_index_version = -1
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stopping = asyncio.Event()
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return (
+            self._loop is not None
+            and not self._loop.is_closed()
+            and bool(self._servers)
+            and not self._stopping.is_set()
+        )
+
+    def _bind_loop(self) -> bool:
+        """Bind the pool to the running event loop.
+
+        Sessions belong to the loop they were opened in, so if that loop has since closed, the pool
+        state is discarded and will be reconnected in the current loop.
+
+        Returns:
+            Whether the pool was already bound to the running loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return True
+        if self._loop is not None and not self._loop.is_closed() and self._servers:
+            raise RuntimeError("Session pool is already running in a different event loop")
+        self._loop = loop
+        self._servers = {}
+        self._stopping = asyncio.Event()
+        self._start_lock = asyncio.Lock()
+        self.version += 1
+        return False
+
+    async def start(self) -> None:
+        """Connect to all servers (no-op if already running).
+
+        Returns once every server has either connected or failed its first attempt. Failed servers
+        keep retrying in the background.
+        """
+        self._bind_loop()
+        async with self._start_lock:
+            if self.running:
+                return
+            self._stopping.clear()
+            for name, connection in self.connections.items():
+                server = _PooledServer(name, connection, self.lazy_servers.get(name))
+                if self.catalog is not None:
+                    restored = self.catalog.restore(name, server.key)
+                    if restored is not None:
+                        # Serve tools from the catalog until the server has connected
+                        self._set_tools(server, restored)
+                server.task = asyncio.create_task(
+                    self._supervise(server), name=f"mcp-session-{name}"
+                )
+                self._servers[name] = server
+            self.version += 1
+            await asyncio.gather(*(s.attempted.wait() for s in self._servers.values()))
+
+    async def stop(self) -> None:
+        """Close all sessions (and stop any background reconnection)."""
+        if not self._bind_loop():
+            return
+        async with self._start_lock:
+            self._stopping.set()
+            tasks = [s.task for s in self._servers.values() if s.task is not None]
+            if tasks:
+                _, pending = await asyncio.wait(tasks, timeout=self.initialize_timeout_s)
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            self._servers = {}
+
+    @property
+    def sessions(self) -> dict[str, ClientSession]:
+        """Currently live sessions."""
+        return {
+            name: server.session
+            for name, server in self._servers.items()
+            if server.session is not None
+        }
+
+    @property
+    def server_name_to_tools(self) -> dict[str, list[StructuredTool]]:
+        """Tools of the currently connected servers.
+
+        Also includes servers with known tools that are not connected yet (lazy servers, or servers
+        whose tools were restored from the catalog) unless they have failed to connect.
+        """
+        return {
+            name: server.tools for name, server in self._servers.items() if server.tools_visible
+        }
+
+    @property
+    def errored_servers(self) -> ErroredServers:
+        """Servers that are not currently connected along with the last error."""
+        return {
+            name: (server.connection, server.error)
+            for name, server in self._servers.items()
+            if server.error is not None and not server.connected.is_set()
+        }
+
+    @property
+    def tool_index(self) -> dict[tuple[str, str], StructuredTool]:
+        """Tools of the currently connected servers by (server name, tool name).
+
+        Only rebuilt when the pool's version has changed.
+        """
+        if self._tool_index_version != self.version:
+            self._tool_index = {
+                (server_name, tool.name): tool
+                for server_name, tools in self.server_name_to_tools.items()
+                for tool in tools
+            }
+            self._tool_index_version = self.version
+        return self._tool_index
+
+    def get_tools(self) -> list[StructuredTool]:
+        """Get all tools available from all connected servers."""
+        return [tool for tools in self.server_name_to_tools.values() for tool in tools]
+
+    async def get_session(self, server_name: str) -> ClientSession:
+        """Get the live session for a server.
+
+        Waits briefly for a connection attempt to start if it is not connected (e.g. a lazy server
+        that isn't running), then for that attempt to finish.
+        """
+        server = self._servers.get(server_name)
+        if server is None:
+            raise MCPServerConnectionError(f"Server {server_name} is not in the session pool")
+        if not server.connected.is_set():
+            server.wanted.set()
+            await self._wait_any(
+                server.connected, server.connecting, timeout=self.initialize_timeout_s
+            )
+            if server.connecting.is_set():
+                # (the attempt has its own timeouts for starting, pinging and listing tools)
+                await server.attempt_finished.wait()
+            if not server.connected.is_set():
+                raise MCPServerConnectionError(
+                    f"Server {server_name} is not connected: {server.error}"
+                )
+        assert server.session is not None
+        return server.session
+
+    async def call_tool(
+        self, server_name: str, name: str, arguments: dict[str, Any] | None = None
+    ) -> CallToolResult:
+        """Call a tool on a server (starting it first if it's a lazy server that isn't running)."""
+        session = await self.get_session(server_name)
+        server = self._servers[server_name]
+        server.in_flight += 1
+        try:
+            return await session.call_tool(name, arguments)
+        finally:
+            server.in_flight -= 1
+            server.last_used = time.monotonic()
+
+    async def _supervise(self, server: _PooledServer) -> None:
+        """Own the connection to a single server, reconnecting until the pool is stopped.
+
+        The transport contexts must be entered and exited from the same task, hence a task per
+        server rather than a shared exit stack.
+        """
+        delay = self.reconnect_delay_s
+        while not self._stopping.is_set():
+            if server.tools:
+                # Tools are already known, so no need to hold up startup
+                server.attempted.set()
+                if server.lazy:
+                    # Only connect once a session is actually needed
+                    await self._wait_any(server.wanted, self._stopping)
+                    if self._stopping.is_set():
+                        return
+            idle = False
+            server.attempt_finished.clear()
+            server.connecting.set()
+            try:
+                async with AsyncExitStack() as stack:
+                    session, initialized = await open_session(
+                        stack,
+                        server.connection,
+                        initialize_timeout_s=self.initialize_timeout_s,
+                        message_handler=self._make_message_handler(server),
+                    )
+                    info = initialized.serverInfo
+                    server.server_version = f"{info.name} {info.version}"
+                    # Health check on the session that will actually be used
+                    await asyncio.wait_for(session.send_ping(), timeout=self.initialize_timeout_s)
+                    await self._list_tools(server, session)
+                    self._set_connected(server, session)
+                    delay = self.reconnect_delay_s
+                    idle = await self._watch(server, session)
+            except Exception as e:
+                logging.error(f"MCP server {server.name} failed: {e!r}")
+                self._set_error(server, e)
+            finally:
+                self._set_disconnected(server)
+                self._end_attempt(server)
+            if idle:
+                continue
+            # (for lazy servers, the next tool call triggers the next attempt)
+            server.wanted.clear()
+            if server.lazy and server.tools:
+                continue
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except TimeoutError:
+                delay = min(delay * 2, self.max_reconnect_delay_s)
+
+    async def _list_tools(self, server: _PooledServer, session: ClientSession) -> bool:
+        """List the server's tools, only remaking them if they changed.
+
+        Returns:
+            Whether the tools changed.
+        """
+        server.tools_changed.clear()
+        listed = await asyncio.wait_for(session.list_tools(), timeout=self.initialize_timeout_s)
+        self._update_catalog(server, listed.tools)
+        if server.tools and listed.tools == server.tool_schemas:
+            return False
+        self._set_tools(server, listed.tools)
+        return True
+
+    def _set_tools(self, server: _PooledServer, schemas: list[Tool]) -> None:
+        server.tool_schemas = schemas
+        live_session = cast(ClientSession, _LiveSession(self, server.name))
+        server.tools = [
+            cast(StructuredTool, convert_mcp_tool_to_langchain_tool(live_session, tool))
+            for tool in schemas
+        ]
+
+    def _update_catalog(self, server: _PooledServer, tools: list[Tool]) -> None:
+        if self.catalog is None:
+            return
+        cached_version = self.catalog.server_version(server.name)
+        if cached_version is not None and cached_version != server.server_version:
+            logging.info(
+                f"MCP server {server.name} changed from {cached_version} to {server.server_version}"
+            )
+        if self.catalog.update(
+            server.name, tools, key=server.key, server_version=server.server_version
+        ):
+            logging.info(f"Updated tool catalog for MCP server {server.name}")
+
+    def _make_message_handler(self, server: _PooledServer) -> MessageHandlerFnT:
+        async def handle_message(
+            message: RequestResponder[types.ServerRequest, types.ClientResult]
+            | types.ServerNotification
+            | Exception,
+        ) -> None:
+            if isinstance(message, types.ServerNotification) and isinstance(
+                message.root, types.ToolListChangedNotification
+            ):
+                logging.info(f"MCP server {server.name} tools changed")
+                server.tools_changed.set()
+
+        return handle_message
+
+    @staticmethod
+    async def _wait_any(*events: asyncio.Event, timeout: float | None = None) -> None:
+        """Wait until any of the events is set (or the timeout passes)."""
+        waiters = [asyncio.ensure_future(event.wait()) for event in events]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
+    async def _watch(self, server: _PooledServer, session: ClientSession) -> bool:
+        """Periodically ping the session and re-list tools when they change.
+
+        Returns when the pool stops, or a lazy server has been idle for long enough (raises if the
+        session fails).
+
+        Returns:
+            Whether the session should be closed for being idle.
+        """
+        interval_s = self.health_check_interval_s
+        if server.idle_shutdown_s is not None:
+            interval_s = min(interval_s, server.idle_shutdown_s)
+        last_listed = time.monotonic()
+        while not self._stopping.is_set():
+            await self._wait_any(self._stopping, server.tools_changed, timeout=interval_s)
+            if self._stopping.is_set():
+                return False
+            now = time.monotonic()
+            if (
+                server.idle_shutdown_s is not None
+                and server.in_flight == 0
+                and now - server.last_used >= server.idle_shutdown_s
+            ):
+                logging.info(f"Shutting down idle MCP server {server.name}")
+                return True
+            if server.tools_changed.is_set() or now - last_listed >= self.tools_refresh_interval_s:
+                if await self._list_tools(server, session):
+                    # New tools (e.g. the tool index needs remaking)
+                    self.version += 1
+                last_listed = now
+            else:
+                await asyncio.wait_for(session.send_ping(), timeout=self.initialize_timeout_s)
+        return False
+
+    def _set_connected(self, server: _PooledServer, session: ClientSession) -> None:
+        logging.info(f"Connected to MCP server {server.name}")
+        server.session = session
+        server.error = None
+        server.last_used = time.monotonic()
+        # (the request that started a lazy server has been served, so it isn't restarted after
+        #  its idle shutdown until another call needs it)
+        server.wanted.clear()
+        server.connected.set()
+        server.attempted.set()
+        self._end_attempt(server)
+        self.version += 1
+
+    @staticmethod
+    def _end_attempt(server: _PooledServer) -> None:
+        server.connecting.clear()
+        server.attempt_finished.set()
+
+    def _set_error(self, server: _PooledServer, error: Exception) -> None:
+        was_visible = server.tools_visible
+        server.error = error
+        if server.tools_visible != was_visible:
+            # E.g. restored (or lazy) tools of a server that failed before ever connecting
+            self.version += 1
+
+    def _set_disconnected(self, server: _PooledServer) -> None:
+        was_connected = server.connected.is_set()
+        was_visible = server.tools_visible
+        server.session = None
+        server.connected.clear()
+        server.attempted.set()
+        if was_connected or server.tools_visible != was_visible:
+            self.version += 1
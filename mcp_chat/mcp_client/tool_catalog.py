@@ -0,0 +1,151 @@
+"""App-level catalog of the tools (names and schemas) provided by each MCP server.
+
+The catalog is kept up to date by the session pool (on connect, when a server sends a
+`tools/list_changed` notification, and on a schedule), so reading it never has to wait on a
+server.
+
+If given a `path`, the catalog is also persisted to disk so that after a restart the tools can be
+served (bound to models, shown in the navbar, etc.) before slow servers have finished starting. Each
+server's entry is keyed by a hash of how the server is run (command/args or url), so entries are
+only restored for servers whose configuration is unchanged. The pool revalidates restored entries
+in the background once the servers connect.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+from langchain_mcp_adapters.client import SSEConnection, StdioConnection
+from mcp.types import Tool
+
+
+def connection_key(connection: SSEConnection | StdioConnection) -> str:
+    """Hash of the parts of a connection that determine which server (and version) is run."""
+    if connection["transport"] == "stdio":
+        identity: dict[str, Any] = {
+            "command": connection["command"],
+            "args": connection["args"],
+            "cwd": str(connection.get("cwd")),
+        }
+    else:
+        identity = {"url": connection["url"]}
+    serialized = json.dumps(identity, sort_keys=True)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+class ToolCatalog:
+    def __init__(self, path: str | None = None) -> None:
+        """Initializes the catalog.
+
+        Args:
+            path: Optional file to persist the catalog to (loaded now, saved on every change).
+        """
+        self.path = Path(path) if path else None
+        self._servers: dict[str, list[Tool]] = {}
+        self._keys: dict[str, str] = {}
+        self._server_versions: dict[str, str | None] = {}
+        self._persisted: dict[str, dict[str, Any]] = self._load()
+        self.version = 0
+        "Incremented whenever the tools of any server change"
+
+    @property
+    def servers(self) -> dict[str, list[Tool]]:
+        """Tools of each server that has listed its tools (or been restored from disk)."""
+        return dict(self._servers)
+
+    def server_version(self, server_name: str) -> str | None:
+        """The version the server reported when its tools were last listed."""
+        return self._server_versions.get(server_name)
+
+    def restore(self, server_name: str, key: str) -> list[Tool] | None:
+        """Restore the persisted tools of a server (only if the server is run the same way).
+
+        Args:
+            key: The `connection_key` of the server's current connection.
+
+        Returns:
+            The restored tools (None if there is no matching entry).
+        """
+        if server_name in self._servers:
+            return self._servers[server_name] if self._keys.get(server_name) == key else None
+        entry = self._persisted.get(server_name)
+        if entry is None or entry.get("key") != key:
+            return None
+        try:
+            tools = [Tool.model_validate(tool) for tool in entry["tools"]]
+        except (KeyError, ValueError) as e:
+            logging.warning(f"Ignoring invalid tool catalog entry for {server_name}: {e!r}")
+            return None
+        self._servers[server_name] = tools
+        self._keys[server_name] = key
+        self._server_versions[server_name] = entry.get("server_version")
+        self.version += 1
+        return tools
+
+    def update(
+        self,
+        server_name: str,
+        tools: list[Tool],
+        key: str | None = None,
+        server_version: str | None = None,
+    ) -> bool:
+        """Set the tools of a server.
+
+        Args:
+            key: The `connection_key` of the server (required for the entry to be persisted).
+            server_version: The server's reported name and version.
+
+        Returns:
+            Whether the tools changed.
+        """
+        if (
+            self._servers.get(server_name) == tools
+            and self._keys.get(server_name) == key
+            and self._server_versions.get(server_name) == server_version
+        ):
+            return False
+        changed = self._servers.get(server_name) != tools
+        self._servers[server_name] = list(tools)
+        self._server_versions[server_name] = server_version
+        if key is not None:
+            self._keys[server_name] = key
+        if changed:
+            self.version += 1
+        self._save()
+        return changed
+
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self.path is None or not self.path.exists():
+            return {}
+        try:
+            data = json.loads(self.path.read_text())
+            servers = data["servers"]
+            assert isinstance(servers, dict)
+        except (OSError, ValueError, KeyError, AssertionError) as e:
+            logging.warning(f"Ignoring unreadable tool catalog {self.path}: {e!r}")
+            return {}
+        return servers
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        self._persisted = {
+            name: {
+                "key": self._keys[name],
+                "server_version": self._server_versions.get(name),
+                "tools": [tool.model_dump(mode="json", exclude_none=True) for tool in tools],
+            }
+            for name, tools in self._servers.items()
+            if name in self._keys
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so that a crash can't leave a half written catalog
+            tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp_path.write_text(json.dumps({"servers": self._persisted}, indent=2))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Failed to save tool catalog to {self.path}: {e!r}")
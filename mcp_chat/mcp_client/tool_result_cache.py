@@ -0,0 +1,80 @@
+"""Cache of the results of idempotent (read-only) tool calls.
+
+Only tools on the allowlist are cached, each with its own TTL (e.g. a git status goes stale much
+faster than a file in a GitHub repo). Calls are keyed by server, tool and the canonicalized
+arguments, so the same call from any conversation returns the cached result without touching the
+server.
+
+Any other (non-allowlisted) tool may change state, so calling one drops all the cached results of
+its server (see `invalidate_server`), e.g. so that a read after an edit isn't served the old file.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+def canonical_args(args: dict[str, Any]) -> str:
+    """Arguments as a string that is the same however the (equal) args are ordered/spaced."""
+    return json.dumps(args, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolResultCache(Generic[T]):
+    def __init__(self, ttls: dict[str, dict[str, float]], max_entries: int = 1000) -> None:
+        """Initializes the cache.
+
+        Args:
+            ttls: TTL in seconds per tool name per server name (the allowlist, any other tools are
+                never cached).
+            max_entries: Max number of cached results (least recently used are evicted first).
+        """
+        self.ttls = ttls
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[str | None, str, str], tuple[float, T]] = OrderedDict()
+
+    def ttl_for(self, server_name: str | None, tool_name: str) -> float | None:
+        """TTL for the tool (None if the tool is not cacheable)."""
+        if server_name is None:
+            return None
+        return (self.ttls.get(server_name) or {}).get(tool_name)
+
+    def is_cacheable(self, server_name: str | None, tool_name: str) -> bool:
+        return self.ttl_for(server_name, tool_name) is not None
+
+    def get(self, server_name: str | None, tool_name: str, args: dict[str, Any]) -> T | None:
+        """Get the cached result for the call if there is an unexpired one."""
+        if not self.is_cacheable(server_name, tool_name):
+            return None
+        key = (server_name, tool_name, canonical_args(args))
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, server_name: str | None, tool_name: str, args: dict[str, Any], result: T) -> None:
+        """Cache the result of the call (if the tool is cacheable)."""
+        ttl = self.ttl_for(server_name, tool_name)
+        if ttl is None:
+            return
+        key = (server_name, tool_name, canonical_args(args))
+        self._entries[key] = (time.monotonic() + ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_server(self, server_name: str | None) -> None:
+        """Drop all cached results of the server's tools."""
+        for key in [key for key in self._entries if key[0] == server_name]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,90 @@
+"""In-process cache of already deserialized conversation messages."""
+
+import json
+from collections import OrderedDict
+from typing import Any, Hashable, Sequence
+
+from langchain_core.messages import BaseMessage
+
+
+def serialized_size(message_dicts: Sequence[dict[str, Any]]) -> int:
+    """Approximate size of messages in bytes (from their serialized form)."""
+    return len(json.dumps(message_dicts, default=str))
+
+
+class _Entry:
+    __slots__ = ("version", "messages", "size")
+
+    def __init__(self, version: int, messages: list[BaseMessage], size: int) -> None:
+        self.version = version
+        self.messages = messages
+        self.size = size
+
+
+class MessageCache:
+    """LRU cache of the messages of conversations, bounded by their total (serialized) size.
+
+    Entries record the store version (log length) they were loaded at. Saving new messages either
+    extends the entry (if it was up to date) or invalidates it, so the cache is only valid as long
+    as all writes to the store go through the same cache (i.e. a single app process).
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get(self, key: Hashable) -> tuple[int, list[BaseMessage]] | None:
+        """Get the version and (a copy of the list of) messages for a conversation if cached."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry.version, list(entry.messages)
+
+    def put(self, key: Hashable, version: int, messages: Sequence[BaseMessage], size: int) -> None:
+        self.invalidate(key)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = _Entry(version, list(messages), size)
+        self._total_bytes += size
+        self._evict()
+
+    def extend(
+        self,
+        key: Hashable,
+        from_version: int,
+        to_version: int,
+        messages: Sequence[BaseMessage],
+        size: int,
+    ) -> None:
+        """Add newly saved messages to an entry, or invalidate it if it wasn't up to date."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        if entry.version != from_version:
+            self.invalidate(key)
+            return
+        self.put(key, to_version, [*entry.messages, *messages], entry.size + size)
+
+    def invalidate(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._total_bytes = 0
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry.size
@@ -1,5 +1,6 @@
 """Common data structures used within the app."""
 
+from dataclasses import dataclass, field
 from enum import StrEnum
 from typing import Any, Protocol
 
@@ -59,12 +60,16 @@ class AIStartUpdate(rx.Base):
     metadata: GraphMetadata
 
 
-class AIStreamUpdate(rx.Base):
-    """Update for streaming AI messages."""
+@dataclass(slots=True)
+class AIStreamUpdate:
+    """Update for streaming AI messages.
+
+    A plain dataclass (not validated like the rx.Base updates) since one is made for every token.
+    """
 
-    type_ = UpdateTypes.ai_stream
     m_id: str
     delta: str
+    type_: UpdateTypes = field(default=UpdateTypes.ai_stream, init=False)
 
 
 class AIEndUpdate(rx.Base):
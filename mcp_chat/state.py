@@ -4,17 +4,15 @@ I.e. the dynamic behavior of the app.
 """
 
 import logging
-import uuid
-from typing import Any, AsyncIterator, Mapping, Sequence
+from typing import Any, Awaitable, Callable
 
 import reflex as rx
 from dependency_injector.wiring import Provide, inject
-from langchain_core.tools import BaseTool
 from reflex.event import EventType
 
 from mcp_chat.containers import Application
-from mcp_chat.graph import GraphRunAdapter, make_functional_graph, make_standard_graph
-from mcp_chat.mcp_client import MultiMCPClient
+from mcp_chat.graph import GraphRunAdapter, get_graph, thread_id_for
+from mcp_chat.mcp_client import MCPSessionPool, ToolCatalog
 
 from .models import (
     QA,
@@ -31,12 +29,23 @@ from .models import (
     ToolsUse,
     UpdateTypes,
 )
+from .stream_buffer import DeltaBuffer
 
 DEFAULT_CHATS = {
     "Intros": [],
 }
 
 
+@inject
+def make_delta_buffer(
+    on_flush: Callable[[str], Awaitable[None]] | None = None,
+    interval_ms: int = Provide[Application.config.stream_flush.interval_ms],
+    max_tokens: int = Provide[Application.config.stream_flush.max_tokens],
+) -> DeltaBuffer:
+    """Buffer for batching streamed tokens into fewer UI updates (configured in config.yml)."""
+    return DeltaBuffer(interval_s=interval_ms / 1000, max_tokens=max_tokens, on_flush=on_flush)
+
+
 class State(rx.State):
     """The app state."""
 
@@ -52,6 +61,19 @@ class State(rx.State):
     processing: bool = False
     """Whether we are processing the question."""
 
+    streaming_chat: str = ""
+    """The chat that the current question belongs to."""
+
+    streaming_answer: str = ""
+    """The answer currently being streamed.
+
+    Kept separate from `chats` (and only moved into it once finished) so that each streamed update
+    only sends this answer to the client rather than every conversation.
+    """
+
+    streaming_tool_uses: list[ToolsUse] = []
+    """The tool uses of the answer currently being streamed."""
+
     current_status: str = ""
     """The current status."""
 
@@ -126,14 +148,32 @@ class State(rx.State):
 
     @rx.event
     @inject
-    async def on_load(self, mcp_client: MultiMCPClient = Provide[Application.mcp_client]) -> None:
-        """Load the state."""
-        server_tools: Mapping[str, Sequence[BaseTool]] = await mcp_client.get_tools_by_server()
+    def on_load(
+        self,
+        tool_catalog: ToolCatalog = Provide[Application.tool_catalog],
+        session_pool: MCPSessionPool = Provide[Application.mcp_session_pool],
+    ) -> None:
+        """Load the state.
+
+        Servers and tools are read from the app's tool catalog, so page load never waits on the
+        MCP servers. Only servers whose tools the pool currently serves are listed (the catalog also
+        holds tools restored from disk for servers that are failing to connect).
+        """
+        available = session_pool.server_name_to_tools
         self.mcp_servers = []
-        for server_name, tools in server_tools.items():
-            tool_infos = [ToolInfo(name=tool.name, description=tool.description) for tool in tools]
+        for server_name, tools in tool_catalog.servers.items():
+            if server_name not in available:
+                continue
+            tool_infos = [
+                ToolInfo(name=tool.name, description=tool.description or "") for tool in tools
+            ]
             self.mcp_servers.append(McpServerInfo(name=server_name, tools=tool_infos))
 
+    @rx.var(cache=True)
+    def is_streaming_current_chat(self) -> bool:
+        """Whether the answer being streamed belongs to the current chat."""
+        return self.processing and self.streaming_chat == self.current_chat
+
     @rx.var(cache=True)
     def chat_titles(self) -> list[str]:
         """Get the list of chat titles.
@@ -153,9 +193,10 @@ class State(rx.State):
         if not question:
             return
 
-        # Initialize new QA object
-        qa = QA(question=question, answer="")
-        self.chats[self.current_chat].append(qa)
+        # The QA is only added to the chat once the answer has finished streaming
+        self.streaming_chat = self.current_chat
+        self.streaming_answer = ""
+        self.streaming_tool_uses = []
         self.processing = True
         self.current_status = "Starting..."
         self.question = question
@@ -163,88 +204,105 @@ class State(rx.State):
         return State.run_request_in_background
 
     @rx.event(background=True)
-    async def run_request_in_background(self) -> AsyncIterator[EventType | None]:
+    async def run_request_in_background(self) -> None:
         """Background task to run the langgraph graph.
 
         Required to use a background task because this could take a while to run.
-        Note: Use `async with self:` in order to update the state in the background task.
+        Note: Use `async with self:` in order to update the state in the background task (changes
+        are sent to the client when the block exits, so there is no need to yield after updates).
         """
         question = self.question
+        chat_name = self.streaming_chat
 
-        # Build the functional or standard graph to run
-        graph = (
-            await make_functional_graph()
-            if self.graph_mode == "functional"
-            else await make_standard_graph()
-        )
+        # Get the functional or standard graph to run (compiled once and reused across requests)
+        graph = await get_graph(self.graph_mode)  # type: ignore[reportArgumentType]
 
         # (since we get updates per tool, we can only check that all tools are done when we
         #  get the next AI message)
         tool_ended = False
-
-        # Run the graph via the adapter, handling updates.
-        async for update in GraphRunAdapter(graph).astream_updates(
-            input=InputState(question=question, conversation_id=self.current_chat),
-            thread_id=str(uuid.uuid4()),
-            llm_model=self.model_name if self.model_name else None,
-        ):
-            update: GraphUpdate
-            match update.type_:
-                case UpdateTypes.graph_start:
-                    logging.debug("Graph start update")
-                    assert isinstance(update, GeneralUpdate)
-                    pass
-                case UpdateTypes.ai_message_start:
-                    logging.debug("AI start update")
-                    assert isinstance(update, AIStartUpdate)
-                    if tool_ended:
-                        # Must have just finished getting tool responses
+        tool_uses: list[ToolsUse] = []
+
+        # Streamed tokens are applied to the state in batches rather than one lock/update each
+        async def apply_deltas(text: str) -> None:
+            async with self:
+                self.streaming_answer += text
+
+        delta_buffer = make_delta_buffer(on_flush=apply_deltas)
+
+        try:
+            # Run the graph via the adapter, handling updates.
+            async for update in GraphRunAdapter(graph).astream_updates(
+                input=InputState(question=question, conversation_id=chat_name),
+                thread_id=thread_id_for(
+                    chat_name, self.graph_mode, self.router.session.client_token
+                ),
+                llm_model=self.model_name if self.model_name else None,
+            ):
+                update: GraphUpdate
+                if update.type_ != UpdateTypes.ai_stream:
+                    # Keep the answer in order with anything else this update adds
+                    await delta_buffer.send()
+                match update.type_:
+                    case UpdateTypes.graph_start:
+                        logging.debug("Graph start update")
+                        assert isinstance(update, GeneralUpdate)
+                        pass
+                    case UpdateTypes.ai_message_start:
+                        logging.debug("AI start update")
+                        assert isinstance(update, AIStartUpdate)
+                        if tool_ended:
+                            # Must have just finished getting tool responses
+                            async with self:
+                                self.streaming_answer += "\n\nFinished calling tool.\n\n---\n\n"
+                                self.current_status = "Finished calling tools."
+                            tool_ended = False
+                    case UpdateTypes.ai_stream:
+                        logging.debug("AI delta update")
+                        assert isinstance(update, AIStreamUpdate)
+                        await delta_buffer.push(update.delta)
+                    case UpdateTypes.ai_stream_tool_call:
+                        pass
+                    case UpdateTypes.ai_message_end:
+                        logging.debug("AI message end update")
+                        assert isinstance(update, AIEndUpdate)
+                        pass
+                    case UpdateTypes.tools_start:
+                        logging.debug("Tools start update")
+                        assert isinstance(update, ToolsStartUpdate)
                         async with self:
-                            self.chats[self.current_chat][
-                                -1
-                            ].answer += "\n\nFinished calling tool.\n\n---\n\n"
-                            self.current_status = "Finished calling tools."
-                        tool_ended = False
-                case UpdateTypes.ai_stream:
-                    logging.debug("AI delta update")
-                    assert isinstance(update, AIStreamUpdate)
-                    async with self:
-                        self.chats[self.current_chat][-1].answer += update.delta
-                        self.chats = self.chats
-                case UpdateTypes.ai_stream_tool_call:
-                    pass
-                case UpdateTypes.ai_message_end:
-                    logging.debug("AI message end update")
-                    assert isinstance(update, AIEndUpdate)
-                    pass
-                case UpdateTypes.tools_start:
-                    logging.debug("Tools start update")
-                    assert isinstance(update, ToolsStartUpdate)
-                    async with self:
-                        self.chats[self.current_chat][-1].answer += "\n\n---\n\nCalling tools..."
-                        self.chats[self.current_chat][-1].tool_uses.append(
-                            ToolsUse(tool_calls=update.calls)
-                        )
-                        self.chats = self.chats
-                        self.current_status = (
-                            f"Calling tools: {[call.name for call in update.calls]})"
+                            self.streaming_answer += "\n\n---\n\nCalling tools..."
+                            tool_uses.append(ToolsUse(tool_calls=update.calls))
+                            self.streaming_tool_uses = list(tool_uses)
+                            self.current_status = (
+                                f"Calling tools: {[call.name for call in update.calls]})"
+                            )
+                    case UpdateTypes.tool_end:
+                        # NOTE: Get update for *each* finished tool
+                        logging.debug("Tool end update")
+                        assert isinstance(update, ToolEndUpdate)
+                        tool_ended = True
+                    case UpdateTypes.graph_end:
+                        logging.debug("Graph end update")
+                        assert isinstance(update, GeneralUpdate)
+                        pass
+                    case _:
+                        logging.info(f"Unknown update type: {update.type_}")
+                        async with self:
+                            self.current_status = f"Unknown update type: {update.type_}"
+        finally:
+            # Freeze the finished answer into the chat history and reset the state after processing
+            await delta_buffer.send()
+            async with self:
+                if chat_name in self.chats:
+                    self.chats[chat_name].append(
+                        QA(
+                            question=question,
+                            tool_uses=tool_uses,
+                            answer=self.streaming_answer,
                         )
-                case UpdateTypes.tool_end:
-                    # NOTE: Get update for *each* finished tool
-                    logging.debug("Tool end update")
-                    assert isinstance(update, ToolEndUpdate)
-                    tool_ended = True
-                case UpdateTypes.graph_end:
-                    logging.debug("Graph end update")
-                    assert isinstance(update, GeneralUpdate)
-                    pass
-                case _:
-                    logging.info(f"Unknown update type: {update.type_}")
-                    async with self:
-                        self.current_status = f"Unknown update type: {update.type_}"
-            yield
-
-        # Reset the state after processing
-        async with self:
-            self.current_status = ""
-            self.processing = False
+                    )
+                    self.chats = self.chats
+                self.streaming_answer = ""
+                self.streaming_tool_uses = []
+                self.current_status = ""
+                self.processing = False
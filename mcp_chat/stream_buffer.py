@@ -0,0 +1,73 @@
+"""Batching of streamed tokens into fewer UI state updates."""
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+
+class DeltaBuffer:
+    """Collects streamed text deltas until they are due to be flushed to the UI.
+
+    Every state update takes the state lock and sends a websocket frame, so applying each token
+    individually is wasteful for fast models. Deltas are flushed once `interval_s` has passed since
+    the last flush or `max_tokens` deltas have accumulated (whichever comes first).
+
+    With `on_flush` set, deltas added via `push` are also sent when the interval runs out while no
+    more deltas arrive (e.g. the model pauses mid-answer), rather than waiting for the next one.
+    """
+
+    def __init__(
+        self,
+        interval_s: float,
+        max_tokens: int,
+        on_flush: Callable[[str], Awaitable[None]] | None = None,
+    ) -> None:
+        self.interval_s = interval_s
+        self.max_tokens = max_tokens
+        self.on_flush = on_flush
+        self._deltas: list[str] = []
+        self._last_flush = time.monotonic()
+        self._send_lock = asyncio.Lock()
+        self._timer: asyncio.Task[None] | None = None
+
+    def add(self, delta: str) -> None:
+        self._deltas.append(delta)
+
+    def should_flush(self) -> bool:
+        if not self._deltas:
+            return False
+        return (
+            len(self._deltas) >= self.max_tokens
+            or time.monotonic() - self._last_flush >= self.interval_s
+        )
+
+    def flush(self) -> str:
+        """Return all pending text (empty if nothing pending) and reset the buffer."""
+        text = "".join(self._deltas)
+        self._deltas = []
+        self._last_flush = time.monotonic()
+        return text
+
+    async def push(self, delta: str) -> None:
+        """Add a delta, sending it to `on_flush` now if due, otherwise by the end of the interval."""
+        self.add(delta)
+        if self.should_flush():
+            await self.send()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._send_when_due())
+
+    async def send(self) -> None:
+        """Send any pending text to `on_flush` (in order with other sends)."""
+        assert self.on_flush is not None, "Sending requires an `on_flush` callback"
+        if self._timer is not None:
+            # Not yet sending (the timer clears itself first), so safe to cancel
+            self._timer.cancel()
+            self._timer = None
+        async with self._send_lock:
+            if text := self.flush():
+                await self.on_flush(text)
+
+    async def _send_when_due(self) -> None:
+        await asyncio.sleep(max(0.0, self._last_flush + self.interval_s - time.monotonic()))
+        self._timer = None
+        await self.send()
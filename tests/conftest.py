@@ -1,11 +1,12 @@
 import os
-from typing import Iterator
+from typing import AsyncIterator, Iterator
 
 import pytest
 from langgraph.checkpoint.memory import MemorySaver
 from langgraph.store.memory import InMemoryStore
 
 from mcp_chat.containers import Application
+from mcp_chat.mcp_client import ToolCatalog
 
 
 @pytest.fixture(scope="session")
@@ -56,7 +57,9 @@ def with_fake_env_vars() -> Iterator[None]:
 
 
 @pytest.fixture(scope="session")
-def container(example_server_config: dict, with_fake_env_vars: None) -> Iterator[Application]:
+async def container(
+    example_server_config: dict, with_fake_env_vars: None
+) -> AsyncIterator[Application]:
     _ = with_fake_env_vars
 
     class NotSetModel:
@@ -69,5 +72,9 @@ def container(example_server_config: dict, with_fake_env_vars: None) -> Iterator
         with container.llm_models.override({container.config.default_model(): NotSetModel()}):
             with container.store.override(InMemoryStore()):
                 with container.checkpointer.override(MemorySaver()):
-                    yield container
+                    # Don't read/write the on-disk catalog during tests
+                    with container.tool_catalog.override(ToolCatalog()):
+                        yield container
+                        # Close any sessions the pool opened lazily during tests
+                        await container.mcp_session_pool().stop()
     container.unwire()
@@ -13,6 +13,14 @@ async def get_data() -> dict[str, str]:
     return {"data": "Hello World!"}
 
 
+@mcp.tool(
+    name="echo-tool",
+    description="Returns the given text",
+)
+async def echo(text: str) -> str:
+    return text
+
+
 @mcp.resource(
     uri="data://example-{name}",
     name="Get name resource",
@@ -4,14 +4,18 @@ Basic testing that the checkpointer is being provided correctly by the container
 Easy to get this wrong when switching from sync MemorySaver to async sqlite/postgres savers.
 """
 
+import time
 from typing import AsyncIterator
 
 import pytest
 
 # from aiosqlite import Connection
 from dependency_injector.wiring import Provide, inject
-from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import BaseCheckpointSaver, empty_checkpoint
+from langgraph.checkpoint.memory import MemorySaver
 
+from mcp_chat.checkpointer import BoundedMemorySaver
 from mcp_chat.containers import Application
 
 # @inject
@@ -56,3 +60,82 @@ async def test_get_checkpointer():
     """Test that the checkpointer is available in the container."""
     checkpointer = await checkpoint_getter()
     assert isinstance(checkpointer, BaseCheckpointSaver)
+
+
+def save_checkpoint(saver: BoundedMemorySaver, thread_id: str, value: str) -> RunnableConfig:
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": value}
+    checkpoint["channel_versions"] = {"messages": 1}
+    config = saver.put(
+        RunnableConfig(configurable={"thread_id": thread_id, "checkpoint_ns": ""}),
+        checkpoint,
+        {"source": "loop", "step": 1, "writes": {}, "parents": {}},
+        {"messages": 1},
+    )
+    saver.put_writes(config, [("messages", value)], task_id="task")
+    return config
+
+
+def test_evicts_least_recently_used_threads():
+    saver = BoundedMemorySaver(max_threads=2)
+    for thread_id in ["a", "b"]:
+        save_checkpoint(saver, thread_id, "value")
+    assert saver.get_tuple(RunnableConfig(configurable={"thread_id": "a"})) is not None
+    save_checkpoint(saver, "c", "value")
+
+    assert saver.thread_ids == ["a", "c"], "b was least recently used"
+    assert saver.get_tuple(RunnableConfig(configurable={"thread_id": "b"})) is None
+    assert not any(key[0] == "b" for key in saver.blobs)
+    assert not any(key[0] == "b" for key in saver.writes)
+
+
+def test_evicts_by_size_and_age():
+    saver = BoundedMemorySaver(max_threads=None, max_bytes=5000)
+    save_checkpoint(saver, "a", "x" * 1000)
+    save_checkpoint(saver, "b", "x" * 1000)
+    assert saver.thread_ids == ["a", "b"]
+    save_checkpoint(saver, "c", "x" * 1000)
+    assert saver.thread_ids == ["b", "c"]
+    assert 4000 < saver.total_bytes <= 5000
+
+    save_checkpoint(saver, "big", "x" * 10_000)
+    assert saver.thread_ids == ["big"], "The thread being written is kept even if too big"
+    saved = saver.get_tuple(RunnableConfig(configurable={"thread_id": "big"}))
+    assert saved is not None and saved.checkpoint["channel_values"]["messages"] == "x" * 10_000
+
+    saver = BoundedMemorySaver(ttl_s=0.01)
+    save_checkpoint(saver, "a", "value")
+    time.sleep(0.02)
+    save_checkpoint(saver, "b", "value")
+    assert saver.thread_ids == ["b"]
+
+
+def test_shallow_keeps_only_latest_checkpoint():
+    saver = BoundedMemorySaver(shallow=True)
+    first = save_checkpoint(saver, "a", "x" * 1000)
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {"messages": "new"}
+    checkpoint["channel_versions"] = {"messages": 2}
+    saver.put(
+        first,
+        checkpoint,
+        {"source": "loop", "step": 2, "writes": {}, "parents": {}},
+        {"messages": 2},
+    )
+
+    assert list(saver.storage["a"][""]) == [checkpoint["id"]]
+    assert list(saver.blobs) == [("a", "", "messages", 2)]
+    assert not saver.writes, "Pending writes of the dropped checkpoint are dropped too"
+    assert saver.total_bytes < 1000
+    saved = saver.get_tuple(RunnableConfig(configurable={"thread_id": "a"}))
+    assert saved is not None and saved.checkpoint["channel_values"]["messages"] == "new"
+
+
+def test_checkpointer_modes(application: Application):
+    modes = application.checkpointer.providers
+    bounded = modes["bounded"]()
+    assert isinstance(bounded, BoundedMemorySaver)
+    assert bounded.max_threads == application.config.checkpointer.max_threads()
+    assert type(modes["memory"]()) is MemorySaver
+    assert modes["none"]() is None
+    assert modes["shallow"]().shallow
@@ -0,0 +1,117 @@
+"""Tests that accumulating streamed chunks gives the same message as adding them together."""
+
+from functools import reduce
+from operator import add
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.messages.tool import tool_call_chunk
+
+from mcp_chat.graph.chunk_accumulator import AIMessageAccumulator
+
+
+def accumulate(chunks: list[AIMessageChunk]) -> AIMessageChunk:
+    accumulator = AIMessageAccumulator(chunks[0])
+    for chunk in chunks[1:]:
+        accumulator.add(chunk)
+    return accumulator.to_message()
+
+
+def test_openai_style_chunks():
+    chunks = [
+        AIMessageChunk(content="", id="run-1"),
+        *(AIMessageChunk(content=f"word{i} ", id="run-1") for i in range(5)),
+        AIMessageChunk(
+            content="",
+            id="run-1",
+            tool_call_chunks=[tool_call_chunk(name="tool", args="", id="call-1", index=0)],
+        ),
+        AIMessageChunk(
+            content="",
+            id="run-1",
+            tool_call_chunks=[tool_call_chunk(name=None, args='{"a": ', id=None, index=0)],
+        ),
+        AIMessageChunk(
+            content="",
+            id="run-1",
+            tool_call_chunks=[tool_call_chunk(name=None, args="1}", id=None, index=0)],
+        ),
+        AIMessageChunk(
+            content="",
+            id="run-1",
+            response_metadata={"finish_reason": "tool_calls"},
+            usage_metadata={"input_tokens": 10, "output_tokens": 7, "total_tokens": 17},
+        ),
+    ]
+    message = accumulate(chunks)
+    assert message == reduce(add, chunks)
+    assert message.content == "word0 word1 word2 word3 word4 "
+    assert message.tool_calls == [
+        {"name": "tool", "args": {"a": 1}, "id": "call-1", "type": "tool_call"}
+    ]
+
+
+def test_anthropic_style_chunks():
+    chunks = [
+        AIMessageChunk(content=[], id="run-2", response_metadata={"model_name": "claude"}),
+        AIMessageChunk(content=[{"text": "Hello", "type": "text", "index": 0}], id="run-2"),
+        AIMessageChunk(content=[{"text": " there", "type": "text", "index": 0}], id="run-2"),
+        AIMessageChunk(
+            content=[
+                {"id": "toolu_1", "input": {}, "name": "tool", "type": "tool_use", "index": 1}
+            ],
+            id="run-2",
+            tool_call_chunks=[tool_call_chunk(name="tool", args="", id="toolu_1", index=1)],
+        ),
+        AIMessageChunk(
+            content=[{"partial_json": '{"a": 1}', "type": "input_json_delta", "index": 1}],
+            id="run-2",
+            tool_call_chunks=[tool_call_chunk(name=None, args='{"a": 1}', id=None, index=1)],
+        ),
+        AIMessageChunk(content="", id="run-2", response_metadata={"stop_reason": "tool_use"}),
+    ]
+    message = accumulate(chunks)
+    assert message == reduce(add, chunks)
+    assert message.content[0] == {"text": "Hello there", "type": "text", "index": 0}
+    assert message.tool_calls[0]["args"] == {"a": 1}
+
+
+def test_mixed_text_and_tool_use_blocks():
+    chunks = [
+        AIMessageChunk(
+            content=[],
+            id="run-3",
+            usage_metadata={"input_tokens": 10, "output_tokens": 1, "total_tokens": 11},
+        ),
+        AIMessageChunk(content=[{"text": "Let me", "type": "text", "index": 0}], id="run-3"),
+        AIMessageChunk(content=[{"text": " check.", "type": "text", "index": 0}], id="run-3"),
+        AIMessageChunk(
+            content=[
+                {"id": "toolu_1", "input": {}, "name": "tool", "type": "tool_use", "index": 1}
+            ],
+            id="run-3",
+            tool_call_chunks=[tool_call_chunk(name="tool", args="", id="toolu_1", index=1)],
+        ),
+        *(
+            AIMessageChunk(
+                content=[{"partial_json": part, "type": "input_json_delta", "index": 1}],
+                id="run-3",
+                tool_call_chunks=[tool_call_chunk(name=None, args=part, id=None, index=1)],
+            )
+            for part in ['{"a"', ": 1", "}"]
+        ),
+        AIMessageChunk(content=[{"text": "Done", "type": "text", "index": 2}], id="run-3"),
+        AIMessageChunk(
+            content="",
+            id="run-3",
+            additional_kwargs={"stop_sequence": None},
+            response_metadata={"stop_reason": "tool_use"},
+            usage_metadata={"input_tokens": 0, "output_tokens": 20, "total_tokens": 20},
+        ),
+    ]
+    message = accumulate(chunks)
+    assert message == reduce(add, chunks)
+    blocks = [block for block in message.content if isinstance(block, dict)]
+    assert [block["type"] for block in blocks] == ["text", "tool_use", "text"]
+    assert blocks[1]["partial_json"] == '{"a": 1}'
+    assert message.tool_calls[0]["args"] == {"a": 1}
+    assert message.usage_metadata is not None and message.usage_metadata["output_tokens"] == 21
@@ -1,5 +1,6 @@
 """Tests that the graph part of the app works correctly."""
 
+import asyncio
 import uuid
 from typing import Any, Callable, Iterator, Literal, Optional, Sequence, Union
 
@@ -8,16 +9,29 @@ from langchain_core.language_models import LanguageModelInput
 from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
 from langchain_core.messages import AIMessage, BaseMessage, ToolCall, ToolMessage
 from langchain_core.runnables import Runnable, RunnableConfig
-from langchain_core.tools import BaseTool
+from langchain_core.tools import BaseTool, StructuredTool
 from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph.graph import CompiledGraph
 from langgraph.pregel import Pregel
 from langgraph.store.base import BaseStore, Item
 
 from mcp_chat.containers import Application
-from mcp_chat.graph import GraphRunAdapter, make_functional_graph, make_standard_graph
+from mcp_chat.graph import (
+    GraphRunAdapter,
+    clear_bound_model_cache,
+    clear_graph_cache,
+    get_graph,
+    make_functional_graph,
+    make_standard_graph,
+    thread_id_for,
+    wait_for_summaries,
+)
 from mcp_chat.graph.functional_implementation import OutputState
-from mcp_chat.models import GraphUpdate, InputState, UpdateTypes
+from mcp_chat.graph.message_log import load_messages
+from mcp_chat.graph.summarization import load_history
+from mcp_chat.graph.tool_binding import get_bound_model, get_tool_node
+from mcp_chat.mcp_client import MultiMCPClient, ToolResultCache
+from mcp_chat.models import GraphUpdate, InputState, ToolEndUpdate, UpdateTypes
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -79,6 +93,26 @@ async def test_compile_graph():
     assert isinstance(graph.checkpointer, BaseCheckpointSaver)
 
 
+@pytest.mark.parametrize("graph_mode", ["standard", "functional"])
+async def test_get_graph_is_cached(
+    graph_mode: Literal["standard", "functional"],
+    mock_chat_model: FakeChatModel,
+    basic_runnable_config: RunnableConfig,
+):
+    clear_graph_cache()
+    graph = await get_graph(graph_mode)
+    assert await get_graph(graph_mode) is graph
+
+    # Model is resolved per run, so the cached graph still uses the current (overridden) model
+    result: dict[str, Any] = await graph.ainvoke(
+        input=InputState(question="Hello"), config=basic_runnable_config
+    )
+    assert OutputState.model_validate(result).response_messages[0].content == "First response"
+
+    clear_graph_cache()
+    assert await get_graph(graph_mode) is not graph
+
+
 @pytest.fixture(params=["standard", "functional"])
 async def graph(request: pytest.FixtureRequest, mock_chat_model: FakeChatModel) -> Pregel:
     _ = mock_chat_model
@@ -121,6 +155,23 @@ async def test_astream_graph_adapter(graph_adapter: GraphRunAdapter):
     assert updates[-1].type_ == UpdateTypes.graph_end
 
 
+@pytest.mark.usefixtures("mock_chat_model")
+async def test_astream_only_requests_handled_modes(
+    graph_adapter: GraphRunAdapter, monkeypatch: pytest.MonkeyPatch
+):
+    requested_modes = []
+    astream = graph_adapter.graph.astream
+
+    def recording_astream(*args: Any, stream_mode: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        requested_modes.append(stream_mode)
+        return astream(*args, stream_mode=stream_mode, **kwargs)
+
+    monkeypatch.setattr(graph_adapter.graph, "astream", recording_astream)
+    async for _ in graph_adapter.astream_updates(input=InputState(question="Hello")):
+        pass
+    assert requested_modes == [["messages", "custom"]], "No full state copies (values) needed"
+
+
 async def test_memory_store_standalone(container: Application):
     store = container.store()
     before = await store.aget(namespace=("testing",), key="test")
@@ -149,6 +200,48 @@ async def test_graph_binds_tools(graph_adapter: GraphRunAdapter, mock_chat_model
     )
 
 
+async def test_graph_reuses_bound_tools(
+    graph_adapter: GraphRunAdapter, mock_chat_model: FakeChatModel
+):
+    mock_chat_model.responses = [AIMessage("First response"), AIMessage("Second response")]
+    _ = await graph_adapter.ainvoke(input=InputState(question="Hello"))
+    _ = await graph_adapter.ainvoke(input=InputState(question="Hello again"))
+
+    assert len(mock_chat_model.tools_bound) == 1, "Should reuse the bound model for the same tools"
+
+
+def test_bound_model_cached_per_tool_set(fake_chat_model: FakeChatModel):
+    def make_tool(name: str) -> BaseTool:
+        return StructuredTool.from_function(lambda: None, name=name, description=name)
+
+    clear_bound_model_cache()
+    tools = [make_tool("a"), make_tool("b")]
+    bound = get_bound_model("fake", fake_chat_model, tools)
+    assert get_bound_model("fake", fake_chat_model, list(reversed(tools))) is bound
+    assert len(fake_chat_model.tools_bound) == 1
+
+    _ = get_bound_model("fake", fake_chat_model, [*tools, make_tool("c")])
+    assert len(fake_chat_model.tools_bound) == 2, "Should rebind when the tool set changes"
+    assert [t.name for t in fake_chat_model.tools_bound[-1]] == ["a", "b", "c"]
+
+    # E.g. a different subset of tools selected for each question
+    assert get_bound_model("fake", fake_chat_model, tools) is bound, "Earlier bindings are kept"
+    assert len(fake_chat_model.tools_bound) == 2
+
+
+def test_tool_node_reused_for_same_tools():
+    def make_tool(name: str) -> BaseTool:
+        return StructuredTool.from_function(lambda: None, name=name, description=name)
+
+    clear_bound_model_cache()
+    tools = [make_tool("a"), make_tool("b")]
+    tool_node = get_tool_node(tools)
+    assert get_tool_node(list(tools)) is tool_node
+    assert get_tool_node([make_tool("a"), make_tool("b")]) is not tool_node, (
+        "Should make a new node for new tool instances"
+    )
+
+
 @pytest.mark.usefixtures("mock_chat_model")
 async def test_graph_has_memory(graph_adapter: GraphRunAdapter, container: Application):
     _ = await graph_adapter.ainvoke(
@@ -160,6 +253,154 @@ async def test_graph_has_memory(graph_adapter: GraphRunAdapter, container: Appli
     value = store.get(namespace=("messages",), key="test-conv-id")
     assert value is not None
 
+    response: OutputState = await graph_adapter.ainvoke(
+        input=InputState(question="Hello again", conversation_id="test-conv-id"),
+    )
+    assert response.response_messages[0].content == "Second response"
+    messages = await load_messages(store, "test-conv-id")
+    assert [m.content for m in messages][-4:] == [
+        "Hello",
+        "First response",
+        "Hello again",
+        "Second response",
+    ]
+
+
+async def test_graph_continues_conversation_thread(
+    graph_adapter: GraphRunAdapter,
+    mock_chat_model: FakeChatModel,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    """On the conversation's own thread, the history is only reloaded if the log has changed."""
+    from mcp_chat.graph import summarization
+
+    loads = []
+
+    async def counting_load_messages(*args: Any, **kwargs: Any) -> Any:  # noqa: ANN401
+        loads.append(args)
+        return await load_messages(*args, **kwargs)
+
+    monkeypatch.setattr(summarization, "load_messages", counting_load_messages)
+    model_inputs: list[list[BaseMessage]] = []
+    generate = FakeChatModel._generate
+
+    def recording_generate(self: FakeChatModel, messages: list[BaseMessage], *args: Any) -> Any:  # noqa: ANN401
+        model_inputs.append(messages)
+        return generate(self, messages, *args)
+
+    monkeypatch.setattr(FakeChatModel, "_generate", recording_generate)
+    mock_chat_model.responses = [AIMessage(f"Response {i}") for i in range(4)]
+
+    conversation_id = str(uuid.uuid4())
+    thread_id = f"session:{conversation_id}"
+    for question in ["Hello", "Hello again"]:
+        _ = await graph_adapter.ainvoke(
+            input=InputState(question=question, conversation_id=conversation_id),
+            thread_id=thread_id,
+        )
+    assert len(loads) == 1, "The second run continues from the thread's checkpoint"
+
+    # E.g. a turn run in the other graph mode (or another session) on its own thread
+    _ = await graph_adapter.ainvoke(
+        input=InputState(question="Elsewhere", conversation_id=conversation_id),
+    )
+    loads.clear()
+    _ = await graph_adapter.ainvoke(
+        input=InputState(question="And again", conversation_id=conversation_id),
+        thread_id=thread_id,
+    )
+    assert len(loads) == 1, "Reloaded since the log changed"
+    assert [m.content for m in model_inputs[-1][1:]] == [
+        "Hello",
+        "Response 0",
+        "Hello again",
+        "Response 1",
+        "Elsewhere",
+        "Response 2",
+        "And again",
+    ]
+
+
+def test_thread_id_for_conversation(container: Application):
+    assert thread_id_for("chat", "functional", "session") != thread_id_for(
+        "chat", "functional", "session"
+    ), "New thread per run by default"
+    with container.config.checkpointer.thread_per_conversation.override(True):
+        thread_id = thread_id_for("chat", "functional", "session")
+        assert thread_id == thread_id_for("chat", "functional", "session")
+        assert thread_id != thread_id_for("chat", "standard", "session")
+        assert thread_id != thread_id_for("chat", "functional", "other session")
+
+
+async def test_graph_summarizes_old_turns(
+    graph_adapter: GraphRunAdapter, mock_chat_model: FakeChatModel, container: Application
+):
+    mock_chat_model.responses = [
+        AIMessage("First response"),
+        AIMessage("Second response"),
+        AIMessage("Summary of first turn"),
+        AIMessage("Third response"),
+    ]
+    conversation_id = str(uuid.uuid4())
+    with container.config.summarization.override(
+        {"enabled": True, "trigger_tokens": 1, "keep_recent_turns": 1}
+    ):
+        for question in ["Hello", "Hello again"]:
+            _ = await graph_adapter.ainvoke(
+                input=InputState(question=question, conversation_id=conversation_id)
+            )
+            await wait_for_summaries()
+
+        store: BaseStore = container.store()
+        summary, messages = await load_history(store, conversation_id)
+        assert summary == "Summary of first turn"
+        assert [m.content for m in messages] == ["Hello again", "Second response"], (
+            "Summarized turns should not be loaded again"
+        )
+
+        response: OutputState = await graph_adapter.ainvoke(
+            input=InputState(question="And again", conversation_id=conversation_id)
+        )
+        assert response.response_messages[0].content == "Third response"
+        assert len(await load_messages(store, conversation_id)) == 6, "Full log is kept"
+
+
+async def test_graph_summarizes_in_background(
+    graph_adapter: GraphRunAdapter, container: Application, monkeypatch: pytest.MonkeyPatch
+):
+    """The run finishes without waiting for the summary (only one runs per conversation)."""
+    from mcp_chat.graph import summarization
+
+    release = asyncio.Event()
+    started = []
+
+    async def slow_update_summary(*args: Any) -> bool:  # noqa: ANN401
+        started.append(args)
+        await release.wait()
+        return False
+
+    monkeypatch.setattr(summarization, "update_summary", slow_update_summary)
+    conversation_id = str(uuid.uuid4())
+    with container.config.summarization.override({"enabled": False}):
+        _ = await graph_adapter.ainvoke(
+            input=InputState(question="Hello", conversation_id=conversation_id)
+        )
+    assert not started and not summarization._summarizing, "No task when disabled"
+
+    with container.config.summarization.override({"enabled": True}):
+        for question in ["Hello again", "And again"]:
+            response: OutputState = await asyncio.wait_for(
+                graph_adapter.ainvoke(
+                    input=InputState(question=question, conversation_id=conversation_id)
+                ),
+                timeout=5,
+            )
+            assert response.response_messages
+    assert len(started) == 1, "Not started again while still running"
+
+    release.set()
+    await wait_for_summaries()
+
 
 @pytest.mark.usefixtures("mock_chat_model")
 async def test_graph_runs_with_missing_mcp_server(
@@ -181,6 +422,93 @@ async def test_graph_runs_with_missing_mcp_server(
         assert response.response_messages[0].content == "First response"
 
 
+async def test_standard_graph_discovers_tools_once_per_run(
+    mock_chat_model: FakeChatModel, monkeypatch: pytest.MonkeyPatch
+):
+    discoveries = 0
+    original_get_tools = MultiMCPClient.get_tools
+
+    async def counting_get_tools(self: MultiMCPClient) -> list[StructuredTool]:
+        nonlocal discoveries
+        discoveries += 1
+        return await original_get_tools(self)
+
+    monkeypatch.setattr(MultiMCPClient, "get_tools", counting_get_tools)
+    responses: list[BaseMessage] = [
+        AIMessage(content="", tool_calls=[ToolCall(id=f"call-{i}", name="test-tool", args={})])
+        for i in range(3)
+    ]
+    mock_chat_model.responses = [*responses, AIMessage("Response after tool calls")]
+
+    graph_adapter = GraphRunAdapter(await make_standard_graph())
+    response: OutputState = await graph_adapter.ainvoke(input=InputState(question="Hello"))
+
+    assert len(response.response_messages) == 7
+    assert discoveries == 1, "Should only discover tools once for the whole tool loop"
+
+
+@pytest.mark.parametrize("graph_mode", ["standard", "functional"])
+async def test_parallel_tool_calls_each_send_tool_end(
+    graph_mode: Literal["standard", "functional"], mock_chat_model: FakeChatModel
+):
+    mock_chat_model.responses = [
+        AIMessage(
+            content="",
+            tool_calls=[ToolCall(id=f"call-{i}", name="test-tool", args={}) for i in range(3)],
+        ),
+        AIMessage("Response after tool calls"),
+    ]
+    graph = (
+        await make_functional_graph() if graph_mode == "functional" else await make_standard_graph()
+    )
+
+    tool_ends: list[str] = []
+    async for update in GraphRunAdapter(graph).astream_updates(input=InputState(question="Hi")):
+        if update.type_ == UpdateTypes.tool_end:
+            assert isinstance(update, ToolEndUpdate)
+            tool_ends.append(update.tool_response.tool_call_id)
+
+    assert sorted(tool_ends) == ["call-0", "call-1", "call-2"], "One update per tool call"
+
+
+async def test_tool_results_cached(
+    graph_adapter: GraphRunAdapter, mock_chat_model: FakeChatModel, container: Application
+):
+    mock_chat_model.responses = [
+        AIMessage(content="", tool_calls=[ToolCall(id="call-1", name="test-tool", args={})]),
+        AIMessage(content="", tool_calls=[ToolCall(id="call-2", name="test-tool", args={})]),
+        AIMessage("Response after tool calls"),
+    ]
+    cache: ToolResultCache[ToolMessage] = ToolResultCache({"example_server": {"test-tool": 60}})
+    with container.tool_result_cache.override(cache):
+        response: OutputState = await graph_adapter.ainvoke(input=InputState(question="Hello"))
+
+    first, second = response.response_messages[1], response.response_messages[3]
+    assert isinstance(first, ToolMessage) and isinstance(second, ToolMessage)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.content == first.content
+    assert second.tool_call_id == "call-2", "Cached result should answer the new call"
+
+
+async def test_tool_results_invalidated_by_other_calls(
+    graph_adapter: GraphRunAdapter, mock_chat_model: FakeChatModel, container: Application
+):
+    """A call that may change state (any tool not on the allowlist) drops the server's results."""
+    mock_chat_model.responses = [
+        AIMessage(content="", tool_calls=[ToolCall(id="call-1", name="test-tool", args={})]),
+        AIMessage(
+            content="", tool_calls=[ToolCall(id="call-2", name="echo-tool", args={"text": "x"})]
+        ),
+        AIMessage(content="", tool_calls=[ToolCall(id="call-3", name="test-tool", args={})]),
+        AIMessage("Response after tool calls"),
+    ]
+    cache: ToolResultCache[ToolMessage] = ToolResultCache({"example_server": {"test-tool": 60}})
+    with container.tool_result_cache.override(cache):
+        _ = await graph_adapter.ainvoke(input=InputState(question="Hello"))
+
+    assert (cache.hits, cache.misses) == (0, 2), "Second read should call the server again"
+
+
 class TestWithToolCalls:
     async def test_single_call(
         self, graph_adapter: GraphRunAdapter, mock_chat_model: FakeChatModel
@@ -0,0 +1,77 @@
+"""Tests for selecting the history sent to the model within a token budget."""
+
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolCall,
+    ToolMessage,
+)
+
+from mcp_chat.containers import Application
+from mcp_chat.graph.history import (
+    clear_token_count_cache,
+    count_tokens,
+    get_max_history_tokens,
+    select_history,
+)
+
+
+def make_turn(i: int, with_tool_call: bool = False) -> list[BaseMessage]:
+    question = HumanMessage(f"Question {i} " + "x" * 400, id=f"q{i}")
+    answer = AIMessage(f"Answer {i}", id=f"a{i}")
+    if not with_tool_call:
+        return [question, answer]
+    call = AIMessage("", tool_calls=[ToolCall(id=f"call{i}", name="tool", args={})], id=f"c{i}")
+    result = ToolMessage("result", tool_call_id=f"call{i}", id=f"r{i}")
+    return [question, call, result, answer]
+
+
+def test_no_budget_keeps_everything():
+    system = SystemMessage("System")
+    previous = [*make_turn(0), *make_turn(1)]
+    current = [HumanMessage("Now")]
+    assert select_history(system, previous, current, max_tokens=None) == [
+        system,
+        *previous,
+        *current,
+    ]
+
+
+def test_drops_oldest_whole_turns():
+    system = SystemMessage("System")
+    turns = [make_turn(0), make_turn(1, with_tool_call=True), make_turn(2)]
+    previous = [message for turn in turns for message in turn]
+    current = [HumanMessage("Now")]
+    budget = sum(count_tokens(m) for m in [system, *current, *turns[1], *turns[2]])
+
+    selected = select_history(system, previous, current, max_tokens=budget)
+    assert selected == [system, *turns[1], *turns[2], *current], (
+        "Should keep the newest turns (including the tool call and its result together)"
+    )
+
+    selected = select_history(system, previous, current, max_tokens=budget - 1)
+    assert selected == [system, *turns[2], *current]
+
+
+def test_current_turn_always_kept():
+    system = SystemMessage("System")
+    current = make_turn(0, with_tool_call=True)
+    assert select_history(system, make_turn(1), current, max_tokens=1) == [system, *current]
+
+
+def test_token_counts_cached_per_message_id():
+    clear_token_count_cache()
+    message = HumanMessage("Hello", id="msg-id")
+    count = count_tokens(message)
+    # Same id is assumed to be the same message
+    assert count_tokens(HumanMessage("Hello" * 100, id="msg-id")) == count
+    assert count_tokens(HumanMessage("Hello" * 100)) > count
+
+
+def test_budget_configured_per_model(container: Application):
+    budgets = container.config.history_max_tokens()
+    default_model = container.config.default_model()
+    assert get_max_history_tokens() == budgets[default_model]
+    assert get_max_history_tokens("unknown_model") is None
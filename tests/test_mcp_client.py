@@ -1,11 +1,28 @@
 """Tests that the graph part of the app works correctly."""
 
 import asyncio
+from pathlib import Path
 
 import pytest
+from mcp import types
 
-from mcp_chat.containers import Application, config_option_to_connections
-from mcp_chat.mcp_client import MultiMCPClient
+from mcp_chat.containers import (
+    Application,
+    config_option_to_call_limits,
+    config_option_to_connections,
+    config_option_to_lazy_servers,
+)
+from mcp_chat.mcp_client import (
+    MCPServerConnectionError,
+    MCPSessionPool,
+    MCPToolCall,
+    MultiMCPClient,
+    ToolCallLimiter,
+    ToolCallLimits,
+    ToolCatalog,
+    ToolResultCache,
+)
+from mcp_chat.mcp_client.tool_catalog import connection_key
 
 
 async def test_mcp_client_with_missing_server(
@@ -31,3 +48,365 @@ async def test_mcp_client_with_missing_server(
             await asyncio.wait_for(func(), timeout=1)
         except TimeoutError:
             pytest.fail("Should not hang on missing server")
+
+
+async def test_mcp_client_connects_once_per_server(
+    example_server_config: dict, missing_stdio_server_config: dict
+):
+    """Failed servers should be dropped without a separate health check connection."""
+    conns = config_option_to_connections(
+        {
+            "example_server": example_server_config,
+            "missing_server": missing_stdio_server_config,
+        }
+    )
+    mcp_client = MultiMCPClient(connections=conns)
+    async with mcp_client:
+        assert list(mcp_client.session_pool.sessions) == ["example_server"]
+        assert list(mcp_client.server_name_to_tools) == ["example_server"]
+        assert "missing_server" in mcp_client.errored_servers
+
+
+async def test_ping_servers_concurrently(
+    example_server_config: dict, missing_stdio_server_config: dict
+):
+    """Each server should get a latency or an error (and not wait on the others)."""
+    conns = config_option_to_connections(
+        {
+            "example_server": example_server_config,
+            "missing_server": missing_stdio_server_config,
+        }
+    )
+    mcp_client = MultiMCPClient(connections=conns)
+    mcp_client.timeout = 5
+    results = await mcp_client.ping_servers()
+
+    assert results["example_server"].error is None
+    assert results["example_server"].latency_s is not None
+    assert results["missing_server"].error is not None
+    assert results["missing_server"].latency_s is None
+
+
+async def test_session_pool_reuses_sessions(example_server_config: dict):
+    """Clients sharing a pool should not open new sessions on every use."""
+    conns = config_option_to_connections({"example_server": example_server_config})
+    pool = MCPSessionPool(connections=conns)
+    try:
+        async with MultiMCPClient(connections=conns, session_pool=pool) as client:
+            tools = await client.get_tools()
+            session = pool.sessions["example_server"]
+        assert [tool.name for tool in tools] == ["test-tool", "echo-tool"]
+        assert pool.running, "Pool should stay connected after the client context exits"
+
+        async with MultiMCPClient(connections=conns, session_pool=pool) as client:
+            await client.get_tools()
+            assert pool.sessions["example_server"] is session
+
+        # Tools remain usable outside of any client context
+        result = await tools[0].ainvoke({})
+        assert "Hello World!" in str(result)
+    finally:
+        await pool.stop()
+    assert pool.sessions == {}
+
+
+async def test_call_tools_batch(example_server_config: dict):
+    conns = config_option_to_connections({"example_server": example_server_config})
+    limiter = ToolCallLimiter({"example_server": ToolCallLimits(max_in_flight=2)})
+    async with MultiMCPClient(connections=conns, call_limiter=limiter) as client:
+        tool = client.get_tool("example_server", "test-tool")
+        assert client.tool_index[("example_server", "test-tool")] is tool
+
+        assert await client.call_tool("example_server", "test-tool") == {"data": "Hello World!"}
+        results = await client.call_tools(
+            [MCPToolCall("example_server", "test-tool") for _ in range(5)]
+            + [MCPToolCall("example_server", "missing-tool")],
+            return_exceptions=True,
+        )
+        assert results[:5] == [{"data": "Hello World!"}] * 5
+        assert isinstance(results[5], ValueError)
+
+        with pytest.raises(ValueError):
+            await client.call_tools([MCPToolCall("missing_server", "test-tool")])
+
+
+async def test_session_pool_with_missing_server(
+    example_server_config: dict, missing_stdio_server_config: dict
+):
+    conns = config_option_to_connections(
+        {
+            "example_server": example_server_config,
+            "missing_server": missing_stdio_server_config,
+        }
+    )
+    pool = MCPSessionPool(connections=conns, initialize_timeout_s=2)
+    try:
+        await asyncio.wait_for(pool.start(), timeout=5)
+        assert list(pool.server_name_to_tools) == ["example_server"]
+        assert "missing_server" in pool.errored_servers
+        with pytest.raises(MCPServerConnectionError):
+            await pool.get_session("missing_server")
+    finally:
+        await pool.stop()
+
+
+async def test_tool_call_limiter_caps_in_flight_per_server():
+    limiter = ToolCallLimiter({"slow": ToolCallLimits(max_in_flight=2, timeout_s=5)})
+    in_flight = {"slow": 0, "other": 0}
+    max_in_flight = {"slow": 0, "other": 0}
+
+    async def call(server_name: str) -> None:
+        in_flight[server_name] += 1
+        max_in_flight[server_name] = max(max_in_flight[server_name], in_flight[server_name])
+        await asyncio.sleep(0.01)
+        in_flight[server_name] -= 1
+
+    await asyncio.gather(
+        *(limiter.run("slow", lambda: call("slow")) for _ in range(6)),
+        *(limiter.run("other", lambda: call("other")) for _ in range(6)),
+    )
+    assert max_in_flight["slow"] == 2
+    assert max_in_flight["other"] == 4, "Default limits for unconfigured servers"
+
+
+async def test_tool_call_limiter_times_out():
+    limiter = ToolCallLimiter({"slow": ToolCallLimits(max_in_flight=1, timeout_s=0.01)})
+    with pytest.raises(TimeoutError):
+        await limiter.run("slow", lambda: asyncio.sleep(1))
+
+
+def test_tool_call_limits_from_config(container: Application, example_server_config: dict):
+    with container.config.mcp_servers.override(
+        {"example_server": {**example_server_config, "max_in_flight": 1, "call_timeout_s": 2}}
+    ):
+        limits = config_option_to_call_limits(container.config.mcp_servers())
+    assert limits["example_server"] == ToolCallLimits(max_in_flight=1, timeout_s=2)
+
+
+def test_tool_result_cache():
+    cache: ToolResultCache[str] = ToolResultCache(
+        {"server": {"read": 60, "expired": -1}}, max_entries=2
+    )
+    assert cache.get("server", "read", {"a": 1, "b": 2}) is None
+    cache.put("server", "read", {"a": 1, "b": 2}, "result")
+    assert cache.get("server", "read", {"b": 2, "a": 1}) == "result", "Args order shouldn't matter"
+    assert cache.get("server", "read", {"a": 2, "b": 2}) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    cache.put("server", "write", {}, "not allowlisted")
+    assert cache.get("server", "write", {}) is None
+    cache.put("server", "expired", {}, "expired")
+    assert cache.get("server", "expired", {}) is None
+
+    cache.put("server", "read", {"a": 2}, "result 2")
+    cache.put("server", "read", {"a": 3}, "result 3")
+    assert cache.get("server", "read", {"a": 1, "b": 2}) is None, "Evicted as least recently used"
+
+    cache.invalidate_server("other_server")
+    assert cache.get("server", "read", {"a": 3}) == "result 3"
+    cache.invalidate_server("server")
+    assert cache.get("server", "read", {"a": 3}) is None
+
+
+async def test_session_pool_keeps_catalog_updated(example_server_config: dict):
+    conns = config_option_to_connections({"example_server": example_server_config})
+    catalog = ToolCatalog()
+    pool = MCPSessionPool(connections=conns, catalog=catalog, health_check_interval_s=0.05)
+    try:
+        await pool.start()
+        assert [tool.name for tool in catalog.servers["example_server"]] == [
+            "test-tool",
+            "echo-tool",
+        ]
+        version = pool.version
+
+        # Tools are re-listed when the server notifies that they changed
+        handle_message = pool._make_message_handler(pool._servers["example_server"])
+        await handle_message(
+            types.ServerNotification(
+                types.ToolListChangedNotification(method="notifications/tools/list_changed")
+            )
+        )
+        server = pool._servers["example_server"]
+        assert server.tools_changed.is_set()
+        await asyncio.sleep(0.2)
+        assert not server.tools_changed.is_set(), "Should have re-listed the tools"
+        assert pool.version == version, "Tools are unchanged so nothing needs remaking"
+        assert "example_server" in pool.server_name_to_tools
+    finally:
+        await pool.stop()
+    assert "example_server" in catalog.servers, "Catalog is kept after disconnecting"
+
+
+def test_lazy_servers_from_config(container: Application, example_server_config: dict):
+    with container.config.mcp_servers.override(
+        {
+            "example_server": {**example_server_config, "lazy": True, "idle_shutdown_s": 10},
+            "eager_server": example_server_config,
+        }
+    ):
+        lazy_servers = config_option_to_lazy_servers(container.config.mcp_servers())
+    assert lazy_servers == {"example_server": 10}
+
+
+async def test_lazy_server_started_on_demand(example_server_config: dict):
+    conns = config_option_to_connections({"example_server": example_server_config})
+    catalog = ToolCatalog()
+    pool = MCPSessionPool(connections=conns, catalog=catalog)
+    try:
+        await pool.start()
+    finally:
+        await pool.stop()
+
+    pool = MCPSessionPool(
+        connections=conns,
+        catalog=catalog,
+        health_check_interval_s=0.05,
+        lazy_servers={"example_server": 0.2},
+    )
+    try:
+        await pool.start()
+        assert pool.sessions == {}, "Tools are in the catalog, so no need to start the server"
+        tools = pool.server_name_to_tools["example_server"]
+        assert [tool.name for tool in tools] == ["test-tool", "echo-tool"]
+
+        # Started by the first call
+        result = await tools[0].ainvoke({})
+        assert "Hello World!" in str(result)
+        assert "example_server" in pool.sessions
+
+        # Then shut down again once idle
+        await asyncio.sleep(0.5)
+        assert pool.sessions == {}
+        assert "example_server" in pool.server_name_to_tools, "Tools are still available"
+        result = await tools[0].ainvoke({})
+        assert "Hello World!" in str(result)
+    finally:
+        await pool.stop()
+
+
+async def test_lazy_server_stays_down_once_idle(example_server_config: dict):
+    conns = config_option_to_connections({"example_server": example_server_config})
+    catalog = ToolCatalog()
+    pool = MCPSessionPool(connections=conns, catalog=catalog)
+    try:
+        await pool.start()
+    finally:
+        await pool.stop()
+
+    pool = MCPSessionPool(
+        connections=conns,
+        catalog=catalog,
+        health_check_interval_s=0.05,
+        lazy_servers={"example_server": 0.1},
+    )
+    try:
+        await pool.start()
+        tools = pool.server_name_to_tools["example_server"]
+        assert "Hello World!" in str(await tools[0].ainvoke({}))
+        server = pool._servers["example_server"]
+        await asyncio.wait_for(server.connected.wait(), timeout=5)
+        while server.connected.is_set():
+            await asyncio.sleep(0.05)
+
+        # Not restarted until another call needs it
+        for _ in range(10):
+            await asyncio.sleep(0.1)
+            assert pool.sessions == {}
+            assert not server.wanted.is_set()
+    finally:
+        await pool.stop()
+
+
+async def test_lazy_server_retried_after_failing_to_start(
+    example_server_config: dict, missing_stdio_server_config: dict
+):
+    conns = config_option_to_connections({"lazy_server": missing_stdio_server_config})
+    catalog = ToolCatalog()
+    catalog.update(
+        "lazy_server",
+        [types.Tool(name="test-tool", inputSchema={"type": "object", "properties": {}})],
+        key=connection_key(conns["lazy_server"]),
+    )
+    pool = MCPSessionPool(
+        connections=conns,
+        catalog=catalog,
+        initialize_timeout_s=5,
+        lazy_servers={"lazy_server": 60},
+    )
+    try:
+        await pool.start()
+        tools = pool.server_name_to_tools["lazy_server"]
+        with pytest.raises(MCPServerConnectionError):
+            await pool.get_session("lazy_server")
+        assert "lazy_server" in pool.server_name_to_tools, "Still offered, so it can be retried"
+        assert ("lazy_server", "test-tool") in pool.tool_index
+
+        # E.g. the server has since been fixed
+        working = config_option_to_connections({"lazy_server": example_server_config})
+        pool._servers["lazy_server"].connection = working["lazy_server"]
+        result = await tools[0].ainvoke({})
+        assert "Hello World!" in str(result)
+        assert "lazy_server" in pool.sessions
+    finally:
+        await pool.stop()
+
+
+async def test_restored_tools_dropped_when_server_fails(missing_stdio_server_config: dict):
+    conns = config_option_to_connections({"missing_server": missing_stdio_server_config})
+    catalog = ToolCatalog()
+    catalog.update(
+        "missing_server",
+        [types.Tool(name="restored-tool", inputSchema={"type": "object"})],
+        key=connection_key(conns["missing_server"]),
+    )
+    pool = MCPSessionPool(connections=conns, catalog=catalog, initialize_timeout_s=2)
+    try:
+        await pool.start()
+        assert list(pool.tool_index) == [("missing_server", "restored-tool")]
+
+        server = pool._servers["missing_server"]
+        while server.error is None:
+            await asyncio.sleep(0.05)
+        assert pool.server_name_to_tools == {}
+        assert pool.tool_index == {}, "Tools of a server that failed are no longer served"
+    finally:
+        await pool.stop()
+
+
+async def test_tool_catalog_persisted(example_server_config: dict, tmp_path: Path):
+    conns = config_option_to_connections({"example_server": example_server_config})
+    path = str(tmp_path / "tool_catalog.json")
+    pool = MCPSessionPool(connections=conns, catalog=ToolCatalog(path))
+    try:
+        await pool.start()
+    finally:
+        await pool.stop()
+
+    # After a restart, tools are served from the catalog before the server has connected
+    catalog = ToolCatalog(path)
+    assert catalog.servers == {}, "Entries are only restored by the pool (if still configured)"
+    pool = MCPSessionPool(connections=conns, catalog=catalog)
+    try:
+        await pool.start()
+        assert pool.sessions == {}, "Startup shouldn't wait for the server"
+        assert [tool.name for tool in catalog.servers["example_server"]] == [
+            "test-tool",
+            "echo-tool",
+        ]
+        tools = pool.server_name_to_tools["example_server"]
+        assert "Hello World!" in str(await tools[0].ainvoke({}))
+        assert catalog.server_version("example_server") is not None, "Revalidated by connecting"
+    finally:
+        await pool.stop()
+
+    # Not restored if the server is run differently
+    changed = {"example_server": {**example_server_config, "args": ["run", "other.py"]}}
+    catalog = ToolCatalog(path)
+    assert (
+        catalog.restore(
+            "example_server",
+            connection_key(config_option_to_connections(changed)["example_server"]),
+        )
+        is None
+    )
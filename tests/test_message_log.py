@@ -0,0 +1,88 @@
+"""Tests for the append-only conversation message log."""
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.store.memory import InMemoryStore
+
+from mcp_chat.containers import Application
+from mcp_chat.graph.message_log import append_messages, get_log_length, load_messages
+from mcp_chat.message_cache import MessageCache
+
+
+async def test_append_only_writes_new_messages():
+    store = InMemoryStore()
+    assert await load_messages(store, "conv") == []
+
+    assert await append_messages(store, "conv", [HumanMessage("Q1"), AIMessage("A1")]) == 2
+    first_item = store.get(namespace=("messages", "conv"), key="0000000000")
+    assert first_item is not None
+
+    assert await append_messages(store, "conv", [HumanMessage("Q2"), AIMessage("A2")]) == 4
+    assert await get_log_length(store, "conv") == 4
+    assert [m.content for m in await load_messages(store, "conv")] == ["Q1", "A1", "Q2", "A2"]
+    first_item_after = store.get(namespace=("messages", "conv"), key="0000000000")
+    assert first_item_after is not None
+    assert first_item_after.updated_at == first_item.updated_at, "Should not rewrite earlier turns"
+
+
+async def test_ranged_load():
+    store = InMemoryStore()
+    await append_messages(store, "conv", [HumanMessage(str(i)) for i in range(5)])
+
+    assert [m.content for m in await load_messages(store, "conv", start=3)] == ["3", "4"]
+    assert [m.content for m in await load_messages(store, "conv", start=1, end=3)] == ["1", "2"]
+    assert await load_messages(store, "conv", start=10) == []
+    assert await load_messages(store, "other-conv") == []
+
+
+async def test_cached_loads_skip_store():
+    store = InMemoryStore()
+    cache = MessageCache(max_bytes=1_000_000)
+    await append_messages(store, "conv", [HumanMessage("Q1"), AIMessage("A1")], cache=cache)
+
+    assert len(await load_messages(store, "conv", cache=cache)) == 2
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    # Saving extends the cached entry, so the next load is served from the cache
+    await append_messages(store, "conv", [HumanMessage("Q2"), AIMessage("A2")], cache=cache)
+    store.delete(namespace=("messages", "conv"), key="0000000000")  # Would be missing if reloaded
+    messages = await load_messages(store, "conv", cache=cache)
+    assert [m.content for m in messages] == ["Q1", "A1", "Q2", "A2"]
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert [m.content for m in await load_messages(store, "conv", start=2, cache=cache)] == [
+        "Q2",
+        "A2",
+    ]
+
+
+async def test_stale_cache_reloaded():
+    store = InMemoryStore()
+    cache = MessageCache(max_bytes=1_000_000)
+    await append_messages(store, "conv", [HumanMessage("Q1"), AIMessage("A1")], cache=cache)
+    assert len(await load_messages(store, "conv", cache=cache)) == 2
+
+    # Written without the cache, so the cached entry is now behind the log
+    length = await append_messages(store, "conv", [HumanMessage("Q2"), AIMessage("A2")])
+    messages = await load_messages(store, "conv", end=length, cache=cache)
+    assert [m.content for m in messages] == ["Q1", "A1", "Q2", "A2"]
+    assert len(await load_messages(store, "conv", cache=cache)) == 4, "Cache updated"
+
+
+async def test_cache_bounded_by_bytes():
+    store = InMemoryStore()
+    await append_messages(store, "conv1", [HumanMessage("a" * 1000)])
+    await append_messages(store, "conv2", [HumanMessage("b" * 1000)])
+    cache = MessageCache(max_bytes=1500)
+
+    await load_messages(store, "conv1", cache=cache)
+    await load_messages(store, "conv2", cache=cache)
+    assert 1000 < cache.total_bytes <= 1500, "Should have evicted the least recently used"
+
+    await load_messages(store, "conv2", cache=cache)
+    await load_messages(store, "conv1", cache=cache)
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_message_cache_from_container(container: Application):
+    cache = container.message_cache()
+    assert cache is container.message_cache(), "Should be shared across the app"
+    assert cache.max_bytes == container.config.message_cache.max_bytes()
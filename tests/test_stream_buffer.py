@@ -0,0 +1,56 @@
+"""Tests for batching streamed tokens into fewer UI updates."""
+
+import asyncio
+import time
+
+from mcp_chat.containers import Application
+from mcp_chat.state import make_delta_buffer
+from mcp_chat.stream_buffer import DeltaBuffer
+
+
+def test_flushes_after_max_tokens():
+    buffer = DeltaBuffer(interval_s=60, max_tokens=3)
+    buffer.add("Hello")
+    buffer.add(" ")
+    assert not buffer.should_flush()
+    buffer.add("World")
+    assert buffer.should_flush()
+    assert buffer.flush() == "Hello World"
+    assert buffer.flush() == "", "Nothing pending after flush"
+
+
+def test_flushes_after_interval():
+    buffer = DeltaBuffer(interval_s=0.01, max_tokens=1000)
+    buffer.add("Hello")
+    time.sleep(0.02)
+    assert buffer.should_flush()
+
+
+async def test_pushed_deltas_sent_after_pause():
+    sent: list[tuple[float, str]] = []
+
+    async def on_flush(text: str) -> None:
+        sent.append((time.monotonic(), text))
+
+    buffer = DeltaBuffer(interval_s=0.05, max_tokens=1000, on_flush=on_flush)
+    start = time.monotonic()
+    await buffer.push("Hello")
+    await buffer.push(" World")
+    assert not sent, "Not due yet"
+
+    # No more deltas arrive (e.g. the model pauses), but the pending text is still sent in time
+    await asyncio.sleep(0.2)
+    assert [text for _, text in sent] == ["Hello World"]
+    assert sent[0][0] - start < 0.1
+
+    await buffer.push("!")
+    await buffer.send()
+    assert [text for _, text in sent] == ["Hello World", "!"]
+    await asyncio.sleep(0.1)
+    assert len(sent) == 2, "Timer cancelled by the explicit send"
+
+
+def test_buffer_configured_from_container(container: Application):
+    buffer = make_delta_buffer()
+    assert buffer.interval_s == container.config.stream_flush.interval_ms() / 1000
+    assert buffer.max_tokens == container.config.stream_flush.max_tokens()
@@ -0,0 +1,82 @@
+"""Tests for selecting the tools most relevant to a question before binding them."""
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import BaseTool, StructuredTool
+
+from mcp_chat.containers import Application
+from mcp_chat.graph.tool_selection import (
+    get_tool_index,
+    get_tool_selection_config,
+    select_tools,
+    select_tools_for_model,
+    tokenize,
+)
+
+
+def make_tool(name: str, description: str) -> BaseTool:
+    return StructuredTool.from_function(lambda: "", name=name, description=description)
+
+
+TOOLS = [
+    make_tool("git_status", "Shows the working tree status of a git repository"),
+    make_tool("git_log", "Shows the commit logs of a git repository"),
+    make_tool("read_file", "Read the complete contents of a file from the file system"),
+    make_tool("list_directory", "Get a listing of all files and directories in a path"),
+    make_tool("searchIssues", "Search for issues in GitHub repositories"),
+]
+
+
+def test_tokenize():
+    assert tokenize("searchIssues in read_file git-log HTTPServer repositories v2") == [
+        "search",
+        "issue",
+        "read",
+        "file",
+        "git",
+        "log",
+        "http",
+        "server",
+        "repository",
+        "v",
+        "2",
+    ]
+
+
+def test_selects_most_relevant_tools():
+    selected = select_tools(TOOLS, "What is in the file README.md?", top_k=1)
+    assert [tool.name for tool in selected] == ["read_file"]
+
+    selected = select_tools(TOOLS, "Show me the recent commits in this git repository", top_k=2)
+    assert [tool.name for tool in selected] == ["git_status", "git_log"]
+
+    selected = select_tools(TOOLS, "Any open issues?", top_k=1, pinned=["list_directory"])
+    assert [tool.name for tool in selected] == ["list_directory", "searchIssues"]
+
+    assert select_tools(TOOLS, "anything", top_k=None) == TOOLS
+    assert select_tools(TOOLS, "anything", top_k=len(TOOLS)) == TOOLS
+
+
+def test_tool_index_reused():
+    assert get_tool_index(TOOLS) is get_tool_index(list(TOOLS))
+    assert get_tool_index(TOOLS) is not get_tool_index(TOOLS[:2])
+
+
+def test_tool_selection_config(container: Application):
+    with container.config.tool_selection.override(
+        {"some_model": {"top_k": 3, "pinned": ["read_file"]}}
+    ):
+        assert get_tool_selection_config("some_model") == (3, ["read_file"])
+        assert get_tool_selection_config("other_model") == (None, [])
+
+
+def test_recently_called_tools_selected(container: Application):
+    history = [
+        HumanMessage("Any open issues?"),
+        AIMessage("", tool_calls=[{"name": "searchIssues", "args": {}, "id": "call-1"}]),
+    ]
+    with container.config.tool_selection.override({"some_model": {"top_k": 1}}):
+        selected = select_tools_for_model("some_model", TOOLS, "Do that again")
+        assert "searchIssues" not in [tool.name for tool in selected]
+
+        selected = select_tools_for_model("some_model", TOOLS, "Do that again", history)
+        assert "searchIssues" in [tool.name for tool in selected], "Follow-ups keep their tools"